@@ -0,0 +1,82 @@
+import time
+from logging import getLogger
+
+import store
+import wib
+
+LOGGER = getLogger(__name__)
+
+# Interval polling per member berdasarkan riwayat live:
+# - sedang live atau berada di jam live yang biasa -> interval cepat (`base`)
+# - tidak live -> mundur dua kali lipat per hari tanpa live, maksimal `cap`
+# Profil (histogram jam mulai live WIB + waktu live terakhir) disimpan di state store.
+# Jadwal dihitung dari awal siklus; member dianggap due jika sisa waktunya kurang dari
+# setengah interval, supaya durasi siklus tidak menambah satu siklus penuh ke setiap interval
+HOUR_WINDOW = 1
+DUE_TOLERANCE = 0.5
+
+profiles = store.PersistentDict("activity")
+# "platform:member" -> (waktu due, interval)
+_next_due = {}
+
+
+def _key(platform, member):
+    return f"{platform}:{member}"
+
+
+def _profile(platform, member, now):
+    key = _key(platform, member)
+    profile = profiles.get(key)
+    if profile is None:
+        profile = {"hours": [0] * 24, "last_live": None, "first_seen": now, "online": False}
+        profiles[key] = profile
+    return profile
+
+
+def in_usual_hours(profile, now):
+    hours = profile["hours"]
+    hour = wib.hour(now)
+    return any(hours[(hour + offset) % 24] for offset in range(-HOUR_WINDOW, HOUR_WINDOW + 1))
+
+
+def interval_for(profile, now, base, cap):
+    if profile["online"] or in_usual_hours(profile, now):
+        return base
+    idle_since = profile["last_live"] or profile["first_seen"]
+    idle_days = max(0.0, (now - idle_since) / 86400)
+    return min(cap, base * 2 ** min(idle_days, 16))
+
+
+def _is_due(key, now):
+    due_at, interval = _next_due.get(key, (0, 0))
+    return due_at - interval * DUE_TOLERANCE <= now
+
+
+def due(platform, members, now=None):
+    # Member yang jadwal polling berikutnya sudah (hampir) lewat (member baru selalu due)
+    now = time.time() if now is None else now
+    return [member for member in members if _is_due(_key(platform, member), now)]
+
+
+def observe(platform, members, status, polled, base, cap, now=None):
+    # Catat status terbaru semua member lalu jadwalkan ulang member yang baru saja dipolling.
+    # `now` sebaiknya waktu awal siklus (saat due() dipanggil)
+    now = time.time() if now is None else now
+    polled = set(polled)
+    for member in members:
+        profile = _profile(platform, member, now)
+        online = bool(status.get(member))
+        changed = online != profile["online"]
+        if online and not profile["online"]:
+            profile["hours"][wib.hour(now)] += 1
+        if online:
+            profile["last_live"] = now
+        profile["online"] = online
+        if changed or online:
+            # Simpan ulang supaya perubahan isi profil ikut ditulis ke store
+            profiles[_key(platform, member)] = profile
+
+        if member in polled:
+            interval = interval_for(profile, now, base, cap)
+            _next_due[_key(platform, member)] = (now + interval, interval)
+
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from api import retry
+from api.client import get_client, get_async_client
+
+# Cache respons berumur pendek yang dipakai bersama semua modul api.
+# Request identik yang berjalan bersamaan digabung (single-flight): hanya satu yang
+# benar-benar dikirim, pemanggil lain menunggu dan memakai respons yang sama.
+MAX_ENTRIES = 512
+
+# TTL (detik) per endpoint, dicocokkan dengan host + awalan path. Dibuat lebih pendek dari
+# interval polling supaya hanya duplikat dalam satu siklus yang terlayani dari cache
+ENDPOINT_TTL = [
+    ("www.showroom-live.com", "/api/live/onlives", 15),
+    ("www.showroom-live.com", "/api/room/profile", 20),
+    ("www.showroom-live.com", "/api/live/streaming_url", 30),
+    ("api.idn.app", "/graphql", 15),
+    ("www.idn.app", "/mobile-api/v3/livestream/", 20),
+    ("www.tiktok.com", "/@", 30),
+    ("www.tiktok.com", "/api/live/detail/", 20),
+    ("webcast.tiktok.com", "/webcast/room/info/", 20),
+    ("api.crstlnz.my.id", "/api/recent/", 300),
+    ("api.crstlnz.my.id", "/api/recent", 15),
+]
+
+_entries = OrderedDict()
+_inflight = {}
+_inflight_async = {}
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+
+def ttl_for(url):
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    for endpoint_host, path_prefix, ttl in ENDPOINT_TTL:
+        if host == endpoint_host and parts.path.startswith(path_prefix):
+            return ttl
+    return 0
+
+
+def cache_key(method, url, kwargs):
+    body = kwargs.get("json")
+    if body is not None:
+        body = json.dumps(body, sort_keys=True)
+    else:
+        body = kwargs.get("content") or kwargs.get("data")
+    return method.upper(), url, body
+
+
+def stats():
+    with _lock:
+        return dict(_stats, size=len(_entries), inflight=len(_inflight) + len(_inflight_async))
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def _lookup(key):
+    # Dipanggil dengan _lock dipegang
+    entry = _entries.get(key)
+    if entry is None:
+        return None
+    response, expires = entry
+    if expires <= time.monotonic():
+        del _entries[key]
+        return None
+    _entries.move_to_end(key)
+    _stats["hits"] += 1
+    return response
+
+
+def _store(key, url, response):
+    ttl = ttl_for(url)
+    if ttl <= 0 or response.status_code != 200:
+        return
+    with _lock:
+        _entries[key] = (response, time.monotonic() + ttl)
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+            _stats["evictions"] += 1
+
+
+def fetch(method, url, client=None, **kwargs):
+    key = cache_key(method, url, kwargs)
+    with _lock:
+        response = _lookup(key)
+        if response is not None:
+            return response
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = {"event": threading.Event(), "response": None, "error": None}
+            _inflight[key] = call
+            _stats["misses"] += 1
+        else:
+            _stats["coalesced"] += 1
+
+    if not leader:
+        call["event"].wait()
+        if call["error"] is not None:
+            raise call["error"]
+        return call["response"]
+
+    try:
+        response = retry.request(client or get_client(url), method, url, **kwargs)
+        call["response"] = response
+        _store(key, url, response)
+        return response
+    except Exception as e:
+        call["error"] = e
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+        call["event"].set()
+
+
+async def fetch_async(method, url, client=None, **kwargs):
+    key = cache_key(method, url, kwargs)
+    loop = asyncio.get_running_loop()
+    inflight_key = (id(loop), key)
+    with _lock:
+        response = _lookup(key)
+        if response is not None:
+            return response
+        future = _inflight_async.get(inflight_key)
+        leader = future is None
+        if leader:
+            future = loop.create_future()
+            _inflight_async[inflight_key] = future
+            _stats["misses"] += 1
+        else:
+            _stats["coalesced"] += 1
+
+    if not leader:
+        return await asyncio.shield(future)
+
+    try:
+        response = await retry.request_async(client or get_async_client(url), method, url, **kwargs)
+        _store(key, url, response)
+        future.set_result(response)
+        return response
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Hindari peringatan "exception was never retrieved" jika tidak ada pemanggil lain
+        future.exception()
+        raise
+    finally:
+        with _lock:
+            _inflight_async.pop(inflight_key, None)
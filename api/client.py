@@ -0,0 +1,95 @@
+import httpx
+from threading import Lock
+from urllib.parse import urlsplit
+
+# HTTP/2 hanya aktif jika paket h2 terpasang (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_ENABLED = True
+except ImportError:
+    HTTP2_ENABLED = False
+
+# Batas waktu default: connect cepat gagal, read cukup longgar untuk halaman TikTok
+DEFAULT_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+DEFAULT_LIMITS = httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60.0)
+
+# Pengaturan per upstream host
+HOST_CONFIG = {
+    "www.showroom-live.com": {
+        "limits": httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=90.0),
+    },
+    "api.idn.app": {
+        "limits": httpx.Limits(max_connections=8, max_keepalive_connections=8, keepalive_expiry=90.0),
+    },
+    "www.idn.app": {
+        "limits": httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=90.0),
+    },
+    "www.tiktok.com": {
+        "limits": httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=90.0),
+        "timeout": httpx.Timeout(20.0, connect=5.0),
+    },
+    "webcast.tiktok.com": {
+        "limits": httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=90.0),
+    },
+    "api.crstlnz.my.id": {
+        "limits": httpx.Limits(max_connections=5, max_keepalive_connections=5, keepalive_expiry=60.0),
+        "timeout": httpx.Timeout(20.0, connect=5.0),
+    },
+}
+
+_clients = {}
+_async_clients = {}
+_clients_lock = Lock()
+
+
+def host_of(url):
+    if "://" not in url:
+        return url.lower()
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    # Port non-default dipisah supaya server lokal (benchmark) tidak berbagi pool/breaker
+    return f"{host}:{parts.port}" if parts.port else host
+
+
+def _get_or_create(pool, client_class, url):
+    host = host_of(url)
+    client = pool.get(host)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = pool.get(host)
+        if client is None:
+            config = HOST_CONFIG.get(host, {})
+            client = client_class(
+                http2=HTTP2_ENABLED,
+                timeout=config.get("timeout", DEFAULT_TIMEOUT),
+                limits=config.get("limits", DEFAULT_LIMITS),
+            )
+            pool[host] = client
+        return client
+
+
+def get_client(url):
+    # Satu httpx.Client per host, dipakai ulang supaya koneksi TCP/TLS tetap hidup
+    return _get_or_create(_clients, httpx.Client, url)
+
+
+def get_async_client(url):
+    # Versi async untuk event loop poller, satu httpx.AsyncClient per host
+    return _get_or_create(_async_clients, httpx.AsyncClient, url)
+
+
+def close_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+async def close_async_clients():
+    with _clients_lock:
+        clients = list(_async_clients.values())
+        _async_clients.clear()
+    for client in clients:
+        await client.aclose()
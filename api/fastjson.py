@@ -0,0 +1,19 @@
+import json
+
+# orjson jauh lebih cepat untuk listing besar (onlives, GraphQL IDN); opsional,
+# fallback ke json standar jika tidak terpasang
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def response_json(response):
+    # Pengganti response.json(): decode langsung dari bytes tanpa decode teks dulu
+    return loads(response.content)
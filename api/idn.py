@@ -1,22 +1,14 @@
-import time
-import httpx
-import re
-import pytz
-from datetime import datetime
-from logging import basicConfig, getLogger, INFO
-
-# Konfigurasi logger
-basicConfig(
-    filename="log.txt",
-    format="{asctime} - [{levelname[0]}] {name} [{module}:{lineno}] - {message}",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    style="{",
-    level=INFO
-)
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
 
-LOGGER = getLogger(__name__)
+from api import recent
+from api.cache import fetch, fetch_async
+from api.fastjson import response_json
+from api.records import IdnLive
+from api.recent import find_idn_data_id
 
-jakarta_timezone = pytz.timezone('Asia/Jakarta')
+LOGGER = getLogger(__name__)
 
 # headers for the api
 headers = {
@@ -24,209 +16,215 @@ headers = {
     "Content-Type": "application/json"
 }
 
-def get_livestreams(channel_username):
-    try:
-        url = "https://api.idn.app/graphql"
-
-        # Define the GraphQL query with variables
-        graphql_query = """
-        query GetLivestreams($page: Int, $category: String) {
-        getLivestreams(page: $page, category: $category) {
-            title
-            slug
-            image_url
-            playback_url
-            status
-            live_at
-            scheduled_at
-            category {
-            name
-            slug
-            }
-            creator {
-            name
-            username
-            uuid
-            }
-        }
+# Base URL IDN, bisa diarahkan ke server lokal untuk pengujian
+BASE_URL = "https://www.idn.app"
+GRAPHQL_URL = "https://api.idn.app/graphql"
+
+# Perkiraan nilai rupiah satu gift IDN untuk ringkasan akhir live
+GOLD_RUPIAH = 2500
+
+# Define the GraphQL query with variables
+GRAPHQL_QUERY = """
+query GetLivestreams($page: Int, $category: String) {
+getLivestreams(page: $page, category: $category) {
+    title
+    slug
+    image_url
+    playback_url
+    status
+    live_at
+    scheduled_at
+    category {
+    name
+    slug
+    }
+    creator {
+    name
+    username
+    uuid
+    }
+}
+}
+"""
+
+def build_livestreams_request(page, category="all"):
+    # Set data with the GraphQL query and variables
+    return {
+        "query": GRAPHQL_QUERY,
+        "variables": {
+            "page": page,
+            "category": category
         }
-        """
+    }
 
-        # Create a session object
-        # session = requests.Session()
+def parse_livestreams_page(response):
+    # Check the status code
+    if response.status_code == 200:
+        data = response_json(response)
+        return data.get("data", {}).get("getLivestreams") or []
 
-        # Set the initial page number and category
-        page = 1
-        category = "all"
+    print(f"Error: {response.status_code}, {response.text}")
 
-        # Create a list to store all livestream data
-        all_livestreams = []
+def fetch_livestreams_page(page, category="all", client=None):
+    # Mengembalikan list livestream (kosong = halaman terakhir), None jika error
+    try:
+        # Send a POST request to the GraphQL API
+        response = fetch("POST", GRAPHQL_URL, client, json=build_livestreams_request(page, category), headers=headers)
+        return parse_livestreams_page(response)
+    except Exception as e:
+        LOGGER.warning(f"Error get slug IDN, Exception: {e}")
 
+async def fetch_livestreams_page_async(page, category="all", client=None):
+    try:
+        response = await fetch_async("POST", GRAPHQL_URL, client, json=build_livestreams_request(page, category), headers=headers)
+        return parse_livestreams_page(response)
+    except Exception as e:
+        LOGGER.warning(f"Error get slug IDN, Exception: {e}")
+
+# Halaman yang tetap gagal setelah sekian kali (masing-masing sudah melewati retry api)
+# membatalkan crawl, daripada terus menghantam GraphQL IDN tanpa jeda
+MAX_PAGE_FAILURES = 2
+
+def crawl_windows(fanout, usernames=None):
+    # Generator jendela halaman: yield list halaman yang harus diambil,
+    # terima hasilnya lewat send(), dan kembalikan semua livestream berurutan.
+    # Berhenti di halaman kosong pertama atau saat semua `usernames` sudah ditemukan
+    fanout = max(1, int(fanout))
+    failures = {}
+    wanted = set(usernames) if usernames else None
+    found = set()
+
+    pages = {}
+    end_page = None
+    next_page = 1
+    pending = []
+
+    while True:
+        # Halaman yang gagal dicoba ulang lebih dulu, sisanya diisi halaman baru
+        if end_page is None:
+            while len(pending) < fanout:
+                pending.append(next_page)
+                next_page += 1
+        else:
+            pending = [page for page in pending if page < end_page]
+
+        if not pending:
+            break
+
+        results = yield pending
+
+        retry = []
+        for page, livestreams in zip(pending, results):
+            if livestreams is None:
+                failures[page] = failures.get(page, 0) + 1
+                if failures[page] >= MAX_PAGE_FAILURES:
+                    raise RuntimeError(f"halaman {page} gagal {failures[page]} kali")
+                retry.append(page)
+            elif not livestreams:
+                end_page = page if end_page is None else min(end_page, page)
+            else:
+                pages[page] = livestreams
+                if wanted is not None:
+                    for livestream in livestreams:
+                        found.add((livestream.get("creator") or {}).get("username"))
+        pending = retry
+
+        if wanted is not None and not pending and wanted <= found:
+            break
+
+    all_livestreams = []
+    for page in sorted(pages):
+        if end_page is None or page < end_page:
+            all_livestreams.extend(pages[page])
+
+    return all_livestreams
+
+def crawl_livestreams(fanout=4, usernames=None, fetch_page=fetch_livestreams_page):
+    # Ambil halaman secara paralel per jendela sebanyak `fanout`
+    windows = crawl_windows(fanout, usernames)
+    with ThreadPoolExecutor(max_workers=max(1, int(fanout))) as executor:
+        try:
+            pending = next(windows)
+            while True:
+                pending = windows.send(list(executor.map(fetch_page, pending)))
+        except StopIteration as stop:
+            return stop.value
+
+async def crawl_livestreams_async(fanout=4, usernames=None, fetch_page=fetch_livestreams_page_async):
+    windows = crawl_windows(fanout, usernames)
+    try:
+        pending = next(windows)
         while True:
-            try:
-                # Set variables for the GraphQL query
-                variables = {
-                    "page": page,
-                    "category": category
-                }
-
-                # Set data with the GraphQL query and variables
-                data = {
-                    "query": graphql_query,
-                    "variables": variables
-                }
-
-                # Send a POST request to the GraphQL API
-                response = httpx.post(url, json=data, headers=headers)
-
-                # Check the status code
-                if response.status_code == 200:
-                    # Handle JSON response from the API
-                    data = response.json()
-
-                    # Check if there is no more data
-                    if not data.get("data", {}).get("getLivestreams"):
-                        break
-
-                    # Iterate through the livestreams and add them to the list
-                    for livestream in data["data"]["getLivestreams"]:
-                        all_livestreams.append(livestream)
-
-                    # Increment the page number for the next iteration
-                    page += 1
-                else:
-                    print(f"Error: {response.status_code}, {response.text}")
-                    pass  # pass to the next iteration in case of an error
-            except Exception as e:
-                LOGGER.warning(f"Error get slug IDN, Exception: {e}")
-                pass  # pass to the next iteration in case of an exception
-
-        # Extract and print M3U8 streaming URLs for JKT48 members
-        for livestream in all_livestreams:
-            if "creator" in livestream and "username" in livestream["creator"]:
-                username = livestream["creator"]["username"]
-                if re.fullmatch(f"{channel_username}$", username):
-                    slug = livestream["slug"]
-                    # playback_url = livestream["playback_url"]
-
-                    return slug
-            
-        return None
+            pending = windows.send(await asyncio.gather(*(fetch_page(page) for page in pending)))
+    except StopIteration as stop:
+        return stop.value
+
+def build_snapshot(livestreams):
+    # Index livestream per username creator, dibangun sekali per siklus polling
+    snapshot = {}
+
+    for livestream in livestreams:
+        username = (livestream.get("creator") or {}).get("username")
+        # Simpan kemunculan pertama, sama seperti pencarian linear sebelumnya
+        if username and username not in snapshot:
+            snapshot[username] = {
+                "slug": livestream["slug"],
+                "playback_url": livestream.get("playback_url"),
+                "live_at": livestream.get("live_at"),
+                "image_url": livestream.get("image_url"),
+                "status": livestream.get("status"),
+            }
+
+    return snapshot
+
+async def get_livestreams_snapshot_async(fanout=4, usernames=None):
+    try:
+        return build_snapshot(await crawl_livestreams_async(fanout, usernames))
     except Exception as e:
         LOGGER.warning(f"Error get livestream idn: {e}")
 
-def get_infodata(slug):
-    try:
-        req = httpx.get(f"https://www.idn.app/mobile-api/v3/livestream/{slug}", headers=headers)
-
-        content = req.json()
-        status = content['data']['status']
-        title = content['data']['title']
-        image_url = content['data']['image_url']
-        name = content['data']['creator']['name']
-        view_count = content['data']['view_count']
-        live_at = content['data']['live_at']
-        end_at = content['data']['end_at']
-        playback_url = content['data']['playback_url']
-
-        if status == "live":
-            is_status_online = True
-        else:
-            is_status_online = False
+def get_livestreams(channel_username, snapshot):
+    livestream = (snapshot or {}).get(channel_username)
+    if livestream:
+        return livestream["slug"]
 
-        # Convert live_at and end_at times to Jakarta timezone
-        live_at_jakarta = datetime.fromtimestamp(live_at, tz=pytz.utc).astimezone(jakarta_timezone).strftime("%A, %d %b %Y | %H:%M:%S WIB")
-        end_at_jakarta = datetime.fromtimestamp(end_at, tz=pytz.utc).astimezone(jakarta_timezone).strftime("%A, %d %b %Y | %H:%M:%S WIB")
+    return None
 
-        view_count = format_angka(view_count)
+def parse_infodata(content):
+    status = content['data']['status']
+    title = content['data']['title']
+    image_url = content['data']['image_url']
+    name = content['data']['creator']['name']
+    view_count = content['data']['view_count']
+    live_at = content['data']['live_at']
+    end_at = content['data']['end_at']
+    playback_url = content['data']['playback_url']
 
-        durasi_live = calculate_duration_hhmmss2(live_at, end_at)
+    if status == "live":
+        is_status_online = True
+    else:
+        is_status_online = False
 
-        return title, name, view_count, durasi_live, live_at_jakarta, end_at_jakarta, playback_url, is_status_online, image_url
+    return IdnLive(title, name, view_count, live_at, end_at, playback_url, is_status_online, image_url)
+
+async def get_infodata_async(slug, client=None):
+    try:
+        url = f"{BASE_URL}/mobile-api/v3/livestream/{slug}"
+        req = await fetch_async("GET", url, client, headers=headers)
+        return parse_infodata(response_json(req))
     except Exception as e:
         LOGGER.warning(f"Error get infodata idn: {e}")
 
-def get_id_history_idn(slug):
+def get_id_history_idn(slug, client=None):
     try:
-        api = "https://api.crstlnz.my.id/api/recent?sort=date&page=1&filter=all&order=-1&group=jkt48&type=idn"
-
-        while True:
-            response = httpx.get(api, headers=headers)
-            if response.status_code == 200:
-                data = response.json()
-                recents = data.get("recents", [])
-                if recents:
-                    for recent in recents:
-                        api_slug = recent["idn"]["slug"]
-                        if api_slug == slug:
-                            data_id = recent.get("data_id")
-                            return data_id
-                # Jika data tidak ditemukan, tunggu sebentar sebelum mencoba lagi
-                time.sleep(30)  # Anda bisa sesuaikan interval waktu menunggu
-            else:
-                return f"Failed to fetch data: {response.status_code}"
+        # Satu kali percobaan; None berarti belum terindeks, pemanggil yang menjadwalkan ulang.
+        # Lookup dijawab dari feed recent bersama, bukan download ulang per slug
+        return find_idn_data_id(slug, client)
     except Exception as e:
         LOGGER.warning(f"Error Get ID History IDN: {e}")
 
-def get_history_live_idn(data_id):
+def get_history_live_idn(data_id, client=None):
     try:
-        api = f"https://api.crstlnz.my.id/api/recent/{data_id}"
-
-        response = httpx.get(api, headers=headers)
-        data = response.json()
-
-        waktu_mulai = data["live_info"]["date"]["start"]
-        waktu_selesai = data["live_info"]["date"]["end"]
-        viewers = data["live_info"]["viewers"]["num"]
-        active_viewers = data["live_info"]["viewers"]["active"]
-        total_gifts = data["total_gifts"]
-        comments = data["live_info"]["comments"]["num"]
-        users_comments = data["live_info"]["comments"]["users"]
-
-        # hitung durasi
-        durasi = calculate_duration_hhmmss(waktu_mulai, waktu_selesai)
-
-        rupiah_gold = total_gifts * 2500
-
-        # ubah tanggal
-        waktu_mulai_without_z = waktu_mulai.replace("Z", "")
-        waktu_selesai_without_z = waktu_selesai.replace("Z", "")
-        waktu_mulai_jakarta = datetime.fromisoformat(waktu_mulai_without_z).astimezone(jakarta_timezone).strftime("%A, %d %b %Y | %H:%M:%S WIB")
-        waktu_selesai_jakarta = datetime.fromisoformat(waktu_selesai_without_z).astimezone(jakarta_timezone).strftime("%A, %d %b %Y | %H:%M:%S WIB")
-
-        # format angka ada titiknya
-        viewers = format_angka(viewers)
-        active_viewers = format_angka(active_viewers)
-        total_gifts = format_angka(total_gifts)
-        comments = format_angka(comments)
-        users_comments = format_angka(users_comments)
-
-        return waktu_mulai_jakarta, waktu_selesai_jakarta, durasi, viewers, active_viewers, total_gifts, comments, users_comments, rupiah_gold
+        return recent.get_live_history(data_id, GOLD_RUPIAH, client)
     except Exception as e:
         LOGGER.warning(f"Error Get History Live IDN: {e}")
-
-def convert_seconds_to_hms(seconds):
-    hours = seconds // 3600
-    seconds -= hours * 3600
-    minutes = seconds // 60
-    seconds -= minutes * 60
-    return int(hours), int(minutes), int(seconds)
-
-def calculate_duration_hhmmss(start_str, end_str):
-    start_time = datetime.strptime(start_str, "%Y-%m-%dT%H:%M:%S.%fZ")
-    end_time = datetime.strptime(end_str, "%Y-%m-%dT%H:%M:%S.%fZ")
-    duration = end_time - start_time
-    total_seconds = duration.total_seconds()
-    hours, minutes, seconds = convert_seconds_to_hms(total_seconds)
-    return "{:02d}:{:02d}:{:02d}".format(hours, minutes, seconds)
-
-def calculate_duration_hhmmss2(start_str, end_str):
-    start_time = datetime.fromtimestamp(start_str)
-    end_time = datetime.fromtimestamp(end_str)
-    duration = end_time - start_time
-    total_seconds = duration.total_seconds()
-    hours, minutes, seconds = convert_seconds_to_hms(total_seconds)
-    return "{:02d}:{:02d}:{:02d}".format(hours, minutes, seconds)
-
-def format_angka(angka):
-    return '{:,.0f}'.format(angka).replace(',', '.')
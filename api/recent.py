@@ -0,0 +1,104 @@
+import time
+from threading import Lock
+from logging import getLogger
+
+import wib
+from api.cache import fetch
+from api.fastjson import response_json
+from api.records import LiveHistory
+
+LOGGER = getLogger(__name__)
+
+# headers for the api
+headers = {
+    "User-Agent": "Not a RoBot",
+    "Content-Type": "application/json"
+}
+
+# Base URL feed crstlnz, bisa diarahkan ke server lokal untuk pengujian
+RECENT_URL = "https://api.crstlnz.my.id/api/recent"
+
+# Feed "recent" crstlnz diambil sekali per refresh lalu dipakai semua lookup yang menunggu,
+# jadi saat banyak member selesai live bersamaan cukup satu request per jenis feed
+REFRESH_INTERVAL = 20
+PERPAGE = {
+    "showroom": 50,
+    "idn": 30,
+}
+
+_feeds = {}
+_feed_locks = {feed_type: Lock() for feed_type in PERPAGE}
+
+
+def build_index(recents):
+    by_room_start = {}
+    by_slug = {}
+    for recent in recents:
+        data_id = recent.get("data_id")
+        try:
+            start = wib.parse_iso(recent["live_info"]["date"]["start"])
+            by_room_start.setdefault((str(recent.get("room_id")), start), data_id)
+        except (KeyError, TypeError, ValueError):
+            pass
+        slug = (recent.get("idn") or {}).get("slug")
+        if slug:
+            by_slug.setdefault(slug, data_id)
+    return {"by_room_start": by_room_start, "by_slug": by_slug}
+
+
+def fetch_recent(feed_type, client=None):
+    api = (
+        f"{RECENT_URL}?sort=date&page=1&filter=all&order=-1"
+        f"&perpage={PERPAGE[feed_type]}&search=&group=jkt48&type={feed_type}"
+    )
+    response = fetch("GET", api, client, headers=headers)
+    if response.status_code != 200:
+        LOGGER.warning(f"Failed to fetch data: {response.status_code}")
+        return None
+    return response_json(response).get("recents", [])
+
+
+def get_recent_index(feed_type, max_age=REFRESH_INTERVAL, client=None):
+    # Satu thread yang me-refresh, thread lain menunggu lalu memakai hasil yang sama
+    with _feed_locks[feed_type]:
+        feed = _feeds.get(feed_type)
+        if feed is None or time.time() - feed["fetched_at"] >= max_age:
+            recents = fetch_recent(feed_type, client)
+            if recents is None:
+                return feed
+            feed = build_index(recents)
+            feed["fetched_at"] = time.time()
+            _feeds[feed_type] = feed
+        return feed
+
+
+def find_showroom_data_id(room_id, started_at, client=None):
+    feed = get_recent_index("showroom", client=client)
+    if feed:
+        return feed["by_room_start"].get((str(room_id), int(started_at)))
+
+
+def find_idn_data_id(slug, client=None):
+    feed = get_recent_index("idn", client=client)
+    if feed:
+        return feed["by_slug"].get(slug)
+
+
+def get_live_history(data_id, gold_rate, client=None):
+    # Detail satu live yang sudah selesai; `gold_rate` = nilai rupiah per gift (beda per platform)
+    response = fetch("GET", f"{RECENT_URL}/{data_id}", client, headers=headers)
+    data = response_json(response)
+    live_info = data["live_info"]
+
+    total_gifts = data["total_gifts"]
+
+    return LiveHistory(
+        started=wib.parse_iso(live_info["date"]["start"]),
+        ended=wib.parse_iso(live_info["date"]["end"]),
+        viewers=live_info["viewers"]["num"],
+        active_viewers=live_info["viewers"]["active"],
+        total_gifts=total_gifts,
+        comments=live_info["comments"]["num"],
+        users_comments=live_info["comments"]["users"],
+        gold_rupiah=total_gifts * gold_rate,
+    )
@@ -0,0 +1,53 @@
+from typing import NamedTuple
+
+# Record hasil parsing respons api. Angka dan waktu (epoch detik) disimpan mentah,
+# format tampilan (titik ribuan, tanggal WIB, durasi) dilakukan bot saat pesan dirender. NamedTuple tetap bisa
+# di-unpack posisi seperti tuple lama, tanpa __dict__ per instance.
+
+
+class ShowroomProfile(NamedTuple):
+    room_url_key: str
+    is_onlive: bool
+    image: str
+    started_at: int
+    share_url: str
+    view_num: int
+    is_premium: bool
+
+
+class IdnLive(NamedTuple):
+    title: str
+    name: str
+    view_count: int
+    live_at: int
+    end_at: int
+    playback_url: str
+    is_live: bool
+    image_url: str
+
+
+class LiveHistory(NamedTuple):
+    # Ringkasan live dari crstlnz
+    started: int
+    ended: int
+    viewers: int
+    active_viewers: int
+    total_gifts: int
+    comments: int
+    users_comments: int
+    gold_rupiah: int
+
+
+class TikTokLive(NamedTuple):
+    is_online: bool
+    cover_url: str
+    title: str
+    nickname: str
+    user_count: int
+    live_url: str
+
+
+class TikTokStream(NamedTuple):
+    stream_url: str
+    create_time: int
+    finish_time: int
@@ -0,0 +1,183 @@
+import asyncio
+import random
+import threading
+import time
+from logging import getLogger
+
+import httpx
+
+import metrics
+from api.client import host_of
+
+LOGGER = getLogger(__name__)
+
+# Kebijakan retry bersama untuk semua modul api: percobaan terbatas dengan exponential
+# backoff + jitter, dan circuit breaker per host supaya platform yang sedang gagal
+# dilewati selama masa cooldown alih-alih terus dihantam request.
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 120.0
+
+# Status HTTP yang dianggap gangguan sementara dan layak dicoba ulang
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+_breakers = {}
+_lock = threading.Lock()
+
+
+def backoff_delay(attempt):
+    # Full jitter: acak antara 0 dan batas eksponensial percobaan ke-n
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def _breaker(host):
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = {"state": "closed", "failures": 0, "opened_at": 0.0, "last_error": None, "trips": 0}
+        _breakers[host] = breaker
+    return breaker
+
+
+def before_request(host):
+    with _lock:
+        breaker = _breaker(host)
+        if breaker["state"] == "open":
+            remaining = breaker["opened_at"] + BREAKER_COOLDOWN - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(f"circuit {host} terbuka, {remaining:.0f}s lagi")
+            # Cooldown selesai: izinkan satu request percobaan
+            breaker["state"] = "half_open"
+            breaker["opened_at"] = time.monotonic()
+            LOGGER.info(f"Circuit {host} half-open, mencoba lagi")
+        elif breaker["state"] == "half_open":
+            # Request percobaan yang hilang (dibatalkan) tidak boleh mengunci host selamanya
+            if time.monotonic() - breaker["opened_at"] < BREAKER_COOLDOWN:
+                raise CircuitOpenError(f"circuit {host} sedang diuji")
+            breaker["opened_at"] = time.monotonic()
+
+
+def record_success(host):
+    with _lock:
+        breaker = _breaker(host)
+        if breaker["state"] != "closed":
+            LOGGER.info(f"Circuit {host} tertutup kembali")
+        breaker["state"] = "closed"
+        breaker["failures"] = 0
+
+
+def record_failure(host, error):
+    with _lock:
+        breaker = _breaker(host)
+        breaker["failures"] += 1
+        breaker["last_error"] = str(error)[:200]
+        if breaker["state"] == "half_open" or breaker["failures"] >= BREAKER_THRESHOLD:
+            if breaker["state"] != "open":
+                breaker["trips"] += 1
+                LOGGER.warning(f"Circuit {host} terbuka selama {BREAKER_COOLDOWN:.0f}s: {breaker['last_error']}")
+            breaker["state"] = "open"
+            breaker["opened_at"] = time.monotonic()
+
+
+def breaker_states():
+    with _lock:
+        now = time.monotonic()
+        states = {}
+        for host, breaker in _breakers.items():
+            state = dict(breaker)
+            state["cooldown_remaining"] = max(0.0, breaker["opened_at"] + BREAKER_COOLDOWN - now) if breaker["state"] == "open" else 0.0
+            del state["opened_at"]
+            states[host] = state
+        return states
+
+
+def _should_retry(response):
+    return response.status_code in RETRY_STATUS
+
+
+def _record_attempt(host, started, response=None, error=None):
+    metrics.observe("piobot_upstream_request_duration_seconds", time.monotonic() - started, {"host": host})
+    if response is not None:
+        metrics.inc("piobot_upstream_requests_total", {"host": host, "status": response.status_code})
+        if response.status_code >= 400:
+            metrics.inc("piobot_upstream_errors_total", {"host": host, "kind": f"http_{response.status_code}"})
+    else:
+        metrics.inc("piobot_upstream_requests_total", {"host": host, "status": "error"})
+        metrics.inc("piobot_upstream_errors_total", {"host": host, "kind": type(error).__name__})
+
+
+def _check_breaker(host):
+    try:
+        before_request(host)
+    except CircuitOpenError:
+        metrics.inc("piobot_upstream_errors_total", {"host": host, "kind": "circuit_open"})
+        raise
+
+
+def request(client, method, url, **kwargs):
+    host = host_of(url)
+    _check_breaker(host)
+    for attempt in range(MAX_ATTEMPTS):
+        started = time.monotonic()
+        try:
+            response = client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            _record_attempt(host, started, error=e)
+            error = e
+            response = None
+        except Exception as e:
+            _record_attempt(host, started, error=e)
+            record_failure(host, e)
+            raise
+        else:
+            _record_attempt(host, started, response)
+            if not _should_retry(response):
+                record_success(host)
+                return response
+            error = f"HTTP {response.status_code}"
+
+        if attempt + 1 < MAX_ATTEMPTS:
+            time.sleep(backoff_delay(attempt))
+
+    record_failure(host, error)
+    if response is None:
+        raise error
+    return response
+
+
+async def request_async(client, method, url, **kwargs):
+    host = host_of(url)
+    _check_breaker(host)
+    for attempt in range(MAX_ATTEMPTS):
+        started = time.monotonic()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            _record_attempt(host, started, error=e)
+            error = e
+            response = None
+        except Exception as e:
+            _record_attempt(host, started, error=e)
+            record_failure(host, e)
+            raise
+        else:
+            _record_attempt(host, started, response)
+            if not _should_retry(response):
+                record_success(host)
+                return response
+            error = f"HTTP {response.status_code}"
+
+        if attempt + 1 < MAX_ATTEMPTS:
+            await asyncio.sleep(backoff_delay(attempt))
+
+    record_failure(host, error)
+    if response is None:
+        raise error
+    return response
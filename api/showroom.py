@@ -1,21 +1,18 @@
-import time
-import httpx
-import pytz
-from datetime import datetime
-from logging import basicConfig, getLogger, INFO
-
-# Konfigurasi logger
-basicConfig(
-    filename="log.txt",
-    format="{asctime} - [{levelname[0]}] {name} [{module}:{lineno}] - {message}",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    style="{",
-    level=INFO
-)
+from logging import getLogger
+
+from api import recent
+from api.cache import fetch, fetch_async
+from api.fastjson import response_json
+from api.records import ShowroomProfile
+from api.recent import find_showroom_data_id
 
 LOGGER = getLogger(__name__)
 
-jakarta_timezone = pytz.timezone('Asia/Jakarta')
+# Base URL Showroom, bisa diarahkan ke server lokal untuk pengujian
+BASE_URL = "https://www.showroom-live.com"
+
+# Perkiraan nilai rupiah satu gift Showroom (gold) untuk ringkasan akhir live
+GOLD_RUPIAH = 102
 
 # headers for the api
 headers = {
@@ -23,12 +20,12 @@ headers = {
     "Content-Type": "application/json"
 }
 
-def get_streaming_url(room_id):
+def get_streaming_url(room_id, client=None):
     try:
-        url = f"https://www.showroom-live.com/api/live/streaming_url?room_id={room_id}"
+        url = f"{BASE_URL}/api/live/streaming_url?room_id={room_id}"
 
-        response = httpx.get(url, headers=headers)
-        data = response.json()
+        response = fetch("GET", url, client, headers=headers)
+        data = response_json(response)
 
         streaming_url_list = data.get("streaming_url_list", [])
         for stream in streaming_url_list:
@@ -39,103 +36,67 @@ def get_streaming_url(room_id):
     except Exception as e:
         LOGGER.warning(f"Error get stream url showroom: {e}")
 
-def check_profile_live_status(room_id):
-    try:
-        api = f"https://www.showroom-live.com/api/room/profile?room_id={room_id}"
+def parse_profile(data):
+    room_url_key = data["room_url_key"]
+    is_onlive = data["is_onlive"]
+    image = data["image"]
+    current_live_started_at = data["current_live_started_at"]
+    share_url_live = data["share_url_live"]
+    view_num = data["view_num"]
+    premium_room_type = data["premium_room_type"]
 
-        response = httpx.get(api, headers=headers)
-        data = response.json()
+    if premium_room_type == 1:
+        is_premium = True
+    else:
+        is_premium = False
 
-        room_url_key = data["room_url_key"]
-        is_onlive = data["is_onlive"]
-        image = data["image"]
-        current_live_started_at = data["current_live_started_at"]
-        share_url_live = data["share_url_live"]
-        view_num = data["view_num"]
-        premium_room_type = data["premium_room_type"]
+    return ShowroomProfile(room_url_key, is_onlive, image, current_live_started_at, share_url_live, view_num, is_premium)
 
-        if premium_room_type == 1:
-            is_premium = True
-        else:
-            is_premium = False
+async def check_profile_live_status_async(room_id, client=None):
+    try:
+        api = f"{BASE_URL}/api/room/profile?room_id={room_id}"
 
-        return room_url_key, is_onlive, image, current_live_started_at, share_url_live, view_num, is_premium
+        response = await fetch_async("GET", api, client, headers=headers)
+        return parse_profile(response_json(response))
     except Exception as e:
         LOGGER.warning(f"Error: {e}\nGunakan room_id yang valid!!")
 
-def get_id_history(room_id, current_live_started_at):
-    try:
-        api = f"https://api.crstlnz.my.id/api/recent?sort=date&page=1&filter=all&order=-1&perpage=1&search=&room_id={room_id}&group=jkt48&type=showroom"
-
-        waktu_mulai = datetime.fromtimestamp(current_live_started_at, tz=pytz.utc).astimezone(jakarta_timezone).strftime("%A, %d %b %Y | %H:%M:%S WIB")
-        
-        while True:
-            response = httpx.get(api, headers=headers)
-            if response.status_code == 200:
-                data = response.json()
-                recents = data.get("recents", [])
-                if recents:
-                    for recent in recents:
-                        api_room_id = recent.get("room_id")
-                        start = recent["live_info"]["date"]["start"]
-                        # Hapus "Z" dari string tanggal
-                        start_without_z = start.replace("Z", "")
-                        api_waktu_mulai = datetime.fromisoformat(start_without_z).astimezone(jakarta_timezone).strftime("%A, %d %b %Y | %H:%M:%S WIB")
-                        if api_room_id == room_id and api_waktu_mulai == waktu_mulai:
-                            data_id = recent.get("data_id")
-                            return data_id
-                # Jika data tidak ditemukan, tunggu sebentar sebelum mencoba lagi
-                time.sleep(30)  # Anda bisa sesuaikan interval waktu menunggu
-            else:
-                return f"Failed to fetch data: {response.status_code}"
-    except Exception as e:
-        LOGGER.warning(f"Error Get ID History SR: {e}")
-
-def get_history_live(data_id):
+def parse_onlives(data):
+    # Index room yang sedang live dari daftar onlives: room_id (str) -> info singkat
+    onlives = {}
+    for genre in data.get("onlives", []):
+        for live in genre.get("lives", []):
+            room_id = live.get("room_id")
+            if room_id is not None and str(room_id) not in onlives:
+                onlives[str(room_id)] = {
+                    "started_at": live.get("started_at"),
+                    "view_num": live.get("view_num"),
+                }
+    return onlives
+
+async def get_onlives_async(client=None):
     try:
-        api = f"https://api.crstlnz.my.id/api/recent/{data_id}"
+        api = f"{BASE_URL}/api/live/onlives"
 
-        response = httpx.get(api, headers=headers)
-        data = response.json()
-
-        waktu_mulai = data["live_info"]["date"]["start"]
-        waktu_selesai = data["live_info"]["date"]["end"]
-        viewers = data["live_info"]["viewers"]["num"]
-        active_viewers = data["live_info"]["viewers"]["active"]
-        total_gifts = data["total_gifts"]
-        comments = data["live_info"]["comments"]["num"]
-        users_comments = data["live_info"]["comments"]["users"]
-
-        # hitung durasi
-        durasi = calculate_duration_hhmmss(waktu_mulai, waktu_selesai)
+        response = await fetch_async("GET", api, client, headers=headers)
+        return parse_onlives(response_json(response))
+    except Exception as e:
+        LOGGER.warning(f"Error get onlives showroom: {e}")
 
-        rupiah_gold = total_gifts * 102
+def changed_rooms(room_ids, onlives, last_status):
+    # Room yang status live-nya berbeda dari polling sebelumnya, hanya ini yang perlu cek profile
+    return [room_id for room_id in room_ids if (str(room_id) in onlives) != bool(last_status.get(room_id))]
 
-        # format angka ada titiknya
-        viewers = format_angka(viewers)
-        active_viewers = format_angka(active_viewers)
-        total_gifts = format_angka(total_gifts)
-        comments = format_angka(comments)
-        users_comments = format_angka(users_comments)
+def get_id_history(room_id, current_live_started_at, client=None):
+    try:
+        # Satu kali percobaan; None berarti belum terindeks, pemanggil yang menjadwalkan ulang.
+        # Lookup dijawab dari feed recent bersama, bukan satu request per room
+        return find_showroom_data_id(room_id, current_live_started_at, client)
+    except Exception as e:
+        LOGGER.warning(f"Error Get ID History SR: {e}")
 
-        return waktu_mulai, waktu_selesai, durasi, viewers, active_viewers, total_gifts, comments, users_comments, rupiah_gold
+def get_history_live(data_id, client=None):
+    try:
+        return recent.get_live_history(data_id, GOLD_RUPIAH, client)
     except Exception as e:
         LOGGER.warning(f"Error Get History Live SR: {e}")
-
-def convert_seconds_to_hms(seconds):
-    hours = seconds // 3600
-    seconds -= hours * 3600
-    minutes = seconds // 60
-    seconds -= minutes * 60
-    return int(hours), int(minutes), int(seconds)
-
-def calculate_duration_hhmmss(start_str, end_str):
-    start_time = datetime.strptime(start_str, "%Y-%m-%dT%H:%M:%S.%fZ")
-    end_time = datetime.strptime(end_str, "%Y-%m-%dT%H:%M:%S.%fZ")
-    duration = end_time - start_time
-    total_seconds = duration.total_seconds()
-    hours, minutes, seconds = convert_seconds_to_hms(total_seconds)
-    return "{:02d}:{:02d}:{:02d}".format(hours, minutes, seconds)
-
-def format_angka(angka):
-    return '{:,.0f}'.format(angka).replace(',', '.')
@@ -1,21 +1,16 @@
-import httpx
 import re
-import pytz
-from  datetime import datetime
-from logging import basicConfig, getLogger, INFO
-
-# Konfigurasi logger
-basicConfig(
-    filename="log.txt",
-    format="{asctime} - [{levelname[0]}] {name} [{module}:{lineno}] - {message}",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    style="{",
-    level=INFO
-)
+import time
+from logging import getLogger
+
+from api.cache import fetch_async
+from api.fastjson import response_json
+from api.records import TikTokLive, TikTokStream
 
 LOGGER = getLogger(__name__)
 
-jakarta_timezone = pytz.timezone('Asia/Jakarta')
+# Base URL TikTok, bisa diarahkan ke server lokal untuk pengujian
+BASE_URL = "https://www.tiktok.com"
+WEBCAST_URL = "https://webcast.tiktok.com"
 
 # headers for the api
 headers = {
@@ -23,85 +18,151 @@ headers = {
     "Referer": "https://www.tiktok.com/"
 }
 
-def get_tt_room_id(tiktok_username):
-    try:
-        api = f"https://www.tiktok.com/@{tiktok_username}/live"
+# Cache room_id per username: room yang masih live dipakai ulang sampai TTL habis,
+# room yang sudah selesai (status 4) disimpan untuk mengenali halaman live yang belum berubah
+ROOM_ID_TTL = 600
+room_id_cache = {}
 
-        response = httpx.get(api, follow_redirects=False, headers=headers)
-        if response.status_code == 404:
-            raise ValueError()
+def cached_tt_room_id(tiktok_username):
+    entry = room_id_cache.get(tiktok_username)
+    if entry and not entry["ended"] and entry["expires"] > time.time():
+        return entry["room_id"]
+    return None
 
-        content = response.text
-        if "room_id" not in content:
-            raise ValueError()
+def is_tt_room_ended(tiktok_username, room_id):
+    entry = room_id_cache.get(tiktok_username)
+    return bool(entry and entry["ended"] and entry["room_id"] == room_id)
 
-        room_id = re.findall("room_id=(.*?)\"/>", content)[0]
-        return room_id
-    except Exception as e:
-        # print(f"Error get room id tt: {e}")
-        # LOGGER.warning(f"Error get room id tt: {e}")
-        pass
-
-def is_user_tt_live(room_id):
-    try:   
-        url = f"https://www.tiktok.com/api/live/detail/?aid=1988&roomID={room_id}"
-
-        # content = requests.get(url, headers=headers).text
-        # return '"status":4' not in content
-
-        content = httpx.get(url, headers=headers).json()
-        status = content['LiveRoomInfo']['status']
-        cover_url = content['LiveRoomInfo']['coverUrl']
-        title = content['LiveRoomInfo']['title']
-        nickname = content['LiveRoomInfo']['ownerInfo']['nickname']
-        userCount = content['LiveRoomInfo']['liveRoomStats']['userCount']
-        liveUrl = content['LiveRoomInfo']['liveUrl']
-
-        if status == 4:
-            is_online = False
-        else:
-            is_online = True
+def remember_tt_room(tiktok_username, room_id, ended, ttl=ROOM_ID_TTL):
+    room_id_cache[tiktok_username] = {
+        "room_id": room_id,
+        "ended": ended,
+        "expires": time.time() + ttl,
+    }
 
-        if '?' in liveUrl:
-            base_url = liveUrl.split('?')
-            liveUrl = base_url[0]
-        else:
-            liveUrl = liveUrl
+def forget_tt_room(tiktok_username):
+    room_id_cache.pop(tiktok_username, None)
 
-        userCount = format_angka(userCount)
+def parse_tt_room_id(response):
+    if response.status_code == 404:
+        raise ValueError()
 
-        return is_online, cover_url, title, nickname, userCount, liveUrl
-    except Exception as e:
-        # print(f"Error is user tt live: {e}")
-        # LOGGER.warning(f"Error is user tt live: {e}")
-        pass
+    content = response.text
+    if "room_id" not in content:
+        raise ValueError()
+
+    room_id = re.findall("room_id=(.*?)\"/>", content)[0]
+    return room_id
 
-def get_tt_stream_url(room_id):
+async def get_tt_room_id_async(tiktok_username, client=None):
     try:
-        api = f"https://webcast.tiktok.com/webcast/room/info/?aid=1988&room_id={room_id}"
+        api = f"{BASE_URL}/@{tiktok_username}/live"
 
-        response = httpx.get(api, headers=headers)
+        response = await fetch_async("GET", api, client, follow_redirects=False, headers=headers)
+        return parse_tt_room_id(response)
+    except Exception as e:
+        # Halaman live user yang offline tidak memuat room_id, jadi cukup debug
+        LOGGER.debug(f"Error get room id tt: {e}")
+
+def parse_tt_live_detail(content):
+    status = content['LiveRoomInfo']['status']
+    cover_url = content['LiveRoomInfo']['coverUrl']
+    title = content['LiveRoomInfo']['title']
+    nickname = content['LiveRoomInfo']['ownerInfo']['nickname']
+    userCount = content['LiveRoomInfo']['liveRoomStats']['userCount']
+    liveUrl = content['LiveRoomInfo']['liveUrl']
+
+    if status == 4:
+        is_online = False
+    else:
+        is_online = True
+
+    if '?' in liveUrl:
+        base_url = liveUrl.split('?')
+        liveUrl = base_url[0]
+    else:
+        liveUrl = liveUrl
+
+    return TikTokLive(is_online, cover_url, title, nickname, userCount, liveUrl)
+
+async def is_user_tt_live_async(room_id, client=None):
+    try:
+        url = f"{BASE_URL}/api/live/detail/?aid=1988&roomID={room_id}"
 
-        json = response.json()
-        url = json['data']['stream_url']['hls_pull_url']
-        create_time = json['data']['create_time']
-        finish_time = json['data']['finish_time']
+        response = await fetch_async("GET", url, client, headers=headers)
+        return parse_tt_live_detail(response_json(response))
+    except Exception as e:
+        LOGGER.warning(f"Error is user tt live: {e}")
 
-        # Konversi timestamp menjadi objek datetime
-        create_time = datetime.fromtimestamp(create_time, tz=pytz.utc).astimezone(jakarta_timezone).strftime("%A, %d %b %Y | %H:%M:%S WIB")
-        finish_time = datetime.fromtimestamp(finish_time, tz=pytz.utc).astimezone(jakarta_timezone).strftime("%A, %d %b %Y | %H:%M:%S WIB")
+def parse_tt_stream_url(json):
+    url = json['data']['stream_url']['hls_pull_url']
+    create_time = json['data']['create_time']
+    finish_time = json['data']['finish_time']
 
-        if '?' in url:
-            base_url = url.split('?')
-            stream_url = base_url[0]
-        else:
-            stream_url = url
+    if '?' in url:
+        base_url = url.split('?')
+        stream_url = base_url[0]
+    else:
+        stream_url = url
+
+    return TikTokStream(stream_url, create_time, finish_time)
 
-        return stream_url, create_time, finish_time
+async def get_tt_stream_url_async(room_id, client=None):
+    try:
+        api = f"{WEBCAST_URL}/webcast/room/info/?aid=1988&room_id={room_id}"
+
+        response = await fetch_async("GET", api, client, headers=headers)
+        return parse_tt_stream_url(response_json(response))
     except Exception as e:
-        # print(f"Error get tt stream url: {e}")
-        # LOGGER.warning(f"Error get tt stream url: {e}")
-        pass
+        LOGGER.warning(f"Error get tt stream url: {e}")
+
+def parse_tt_user_room(content):
+    # (room_id, is_online) dari api-live/user/room; status 4 berarti tidak live
+    data = content['data']
+    room_id = data['user'].get('roomId') or None
+    status = (data.get('liveRoom') or {}).get('status', data['user'].get('status'))
+    return room_id, status != 4
 
-def format_angka(angka):
-    return '{:,.0f}'.format(angka).replace(',', '.')
+async def get_tt_user_room_async(tiktok_username, client=None):
+    try:
+        url = f"{BASE_URL}/api-live/user/room/?aid=1988&uniqueId={tiktok_username}&sourceType=54"
+
+        response = await fetch_async("GET", url, client, headers=headers)
+        return parse_tt_user_room(response_json(response))
+    except Exception as e:
+        LOGGER.debug(f"Error get user room tt: {e}")
+
+async def get_tt_status_async(tiktok_username, was_online, client=None):
+    # Status live satu user: (is_tt_live, data_tt_stream_url) atau None jika tidak live/gagal.
+    # Saat live, room_id dari cache cukup. Selain itu satu request JSON ringan (user/room)
+    # menjawab status live; setiap live punya room_id baru, jadi room_id lama di cache tidak
+    # bisa dipakai untuk mendeteksi live berikutnya. Scrape halaman live hanya jika probe gagal
+    room_id = cached_tt_room_id(tiktok_username)
+    if room_id is None:
+        user_room = await get_tt_user_room_async(tiktok_username, client)
+        if user_room is not None:
+            room_id, is_online = user_room
+            if not room_id or (not is_online and not was_online):
+                # Tetap offline, detail room tidak perlu diambil
+                return None
+        else:
+            room_id = await get_tt_room_id_async(tiktok_username, client)
+            if not room_id:
+                return None
+            if not was_online and is_tt_room_ended(tiktok_username, room_id):
+                # Masih room yang sama dengan live terakhir yang sudah selesai, tetap offline
+                return None
+
+    is_tt_live = await is_user_tt_live_async(room_id, client)
+    if not is_tt_live:
+        forget_tt_room(tiktok_username)
+        return None
+
+    is_online = is_tt_live[0]
+    remember_tt_room(tiktok_username, room_id, ended=not is_online)
+
+    # Detail stream (URL, create/finish time) hanya dibutuhkan saat status berubah
+    data_tt_stream_url = None
+    if is_online != was_online:
+        data_tt_stream_url = await get_tt_stream_url_async(room_id, client)
+    return is_tt_live, data_tt_stream_url
@@ -0,0 +1,290 @@
+# Benchmark siklus polling (setara cycle_showroom/cycle_idn/cycle_tiktok di bot.py) terhadap
+# server tiruan Showroom, IDN, TikTok, crstlnz dan Telegram. Selama benchmark, member
+# berganti status live pada waktu acak; dilaporkan waktu siklus, jumlah request per
+# upstream, serta latensi deteksi (live berubah -> siklus melihatnya) dan pengiriman
+# (live berubah -> pesan diterima Telegram tiruan).
+#
+#   python -m bench.cycles --members 10 100 1000 --cycles 5 --interval 2 --latency 0.02
+#
+# Tidak menyentuh platform asli; semua base URL api diarahkan ke server lokal.
+
+import argparse
+import asyncio
+import random
+import statistics
+import threading
+import time
+
+from telegram import Bot
+
+import api.idn
+import api.recent
+import api.showroom
+import api.tiktok
+import sender
+from api.idn import get_livestreams, get_livestreams_snapshot_async, get_infodata_async
+from api.recent import find_idn_data_id, find_showroom_data_id
+from api.showroom import check_profile_live_status_async, get_onlives_async, changed_rooms
+from api.tiktok import get_tt_status_async
+from bench.fake_servers import fake_crstlnz, fake_idn, fake_showroom, fake_telegram, fake_tiktok, idn_slug
+from scheduler import poll_members
+
+TOKEN = "123456:BENCH"
+CHANNEL_ID = "-1001"
+
+
+class Run:
+    # Satu benchmark untuk satu ukuran daftar member
+    def __init__(self, members, args):
+        self.args = args
+        self.room_ids = list(range(1, members + 1))
+        self.idn_users = [f"idnmember{i}" for i in range(members)]
+        self.tt_users = [f"ttmember{i}" for i in range(members)]
+
+        server_args = {"latency": args.latency, "error_rate": args.error_rate, "seed": args.seed}
+        self.showroom = fake_showroom(members, args.live_ratio, listing_size=args.listing_size, **server_args)
+        self.idn = fake_idn(self.idn_users, args.live_ratio, listing_size=args.listing_size, **server_args)
+        self.tiktok = fake_tiktok(self.tt_users, args.live_ratio, **server_args)
+        self.crstlnz = fake_crstlnz(self.showroom.sessions, self.idn.sessions, **server_args)
+        self.telegram = fake_telegram(TOKEN, latency=args.latency, seed=args.seed)
+        self.servers = {
+            "showroom": self.showroom,
+            "idn": self.idn,
+            "tiktok": self.tiktok,
+            "crstlnz": self.crstlnz,
+            "telegram": self.telegram,
+        }
+
+        # Mulai dari kondisi stabil: bot sudah tahu siapa yang sedang live
+        self.status = {
+            platform: {name: member["live"] for name, member in self.servers[platform].sessions.members.items()}
+            for platform in ("showroom", "idn", "tiktok")
+        }
+        self.idn_slugs = {
+            name: idn_slug(name, member) for name, member in self.idn.sessions.members.items() if member["live"]
+        }
+        self.started_at = {room_id: member["started_at"] for room_id, member in self.showroom.sessions.members.items()}
+        self.message_ids = {}
+
+        self.cycles = {platform: [] for platform in self.status}
+        self.detected = []
+        self.delivered = []
+        self.history_found = 0
+        self.history_missing = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        api.showroom.BASE_URL = self.showroom.start()
+        idn_url = self.idn.start()
+        api.idn.BASE_URL = idn_url
+        api.idn.GRAPHQL_URL = f"{idn_url}/graphql"
+        tiktok_url = self.tiktok.start()
+        api.tiktok.BASE_URL = tiktok_url
+        api.tiktok.WEBCAST_URL = tiktok_url
+        api.recent.RECENT_URL = f"{self.crstlnz.start()}/api/recent"
+        api.recent._feeds.clear()
+        api.tiktok.room_id_cache.clear()
+        sender.init(Bot(TOKEN, base_url=f"{self.telegram.start()}/bot"))
+
+    def stop(self):
+        for server in self.servers.values():
+            server.stop()
+
+    # Transisi yang dilihat siklus: catat latensi deteksi lalu kirim/edit pesan lewat sender
+    def transition(self, platform, name, live, history=None):
+        if self.status[platform][name] == live:
+            return
+        self.status[platform][name] = live
+        sessions = self.servers[platform].sessions
+        changed_at = sessions.changed_at.get(name)
+        now = time.time()
+        if changed_at is not None:
+            with self._lock:
+                self.detected.append(now - changed_at)
+
+        key = (platform, name)
+        if live:
+            future = sender.submit("send_photo", CHANNEL_ID, photo="https://example.invalid/cover.jpg",
+                                   caption=f"{name} sedang live {platform}", parse_mode="HTML",
+                                   on_done=lambda message: self.message_ids.__setitem__(key, message.message_id))
+        else:
+            if history is not None:
+                # Percobaan pertama deferred: cari data_id di feed recent crstlnz
+                with self._lock:
+                    if history():
+                        self.history_found += 1
+                    else:
+                        self.history_missing += 1
+            message_id = self.message_ids.pop(key, None)
+            if message_id is None:
+                return
+            future = sender.submit("edit_message_caption", CHANNEL_ID, message_id=message_id,
+                                   caption=f"{name} selesai live {platform}", parse_mode="HTML")
+
+        if changed_at is not None:
+            def done(_, changed_at=changed_at):
+                with self._lock:
+                    self.delivered.append(time.time() - changed_at)
+            future.add_done_callback(done)
+
+    async def cycle_showroom(self):
+        onlives = await get_onlives_async()
+        room_ids = self.room_ids
+        if onlives is not None:
+            room_ids = changed_rooms(self.room_ids, onlives, self.status["showroom"])
+
+        def handle(room_id, profile):
+            if profile is None:
+                return
+            live = profile.is_onlive
+            started_at = self.started_at.get(room_id)
+            if live:
+                self.started_at[room_id] = profile.started_at
+            self.transition("showroom", room_id, live, lambda: find_showroom_data_id(room_id, started_at))
+
+        await poll_members(room_ids, check_profile_live_status_async, handle, self.args.concurrency)
+
+    async def cycle_idn(self):
+        snapshot = await get_livestreams_snapshot_async(self.args.fanout, self.idn_users) or {}
+
+        async def fetch(username):
+            slug = get_livestreams(username, snapshot) or self.idn_slugs.get(username)
+            if slug:
+                return slug, await get_infodata_async(slug)
+
+        def handle(username, data):
+            if data is None or data[1] is None:
+                return
+            slug, data_info = data
+            self.idn_slugs[username] = slug
+            self.transition("idn", username, data_info.is_live, lambda: find_idn_data_id(slug))
+
+        await poll_members(self.idn_users, fetch, handle, self.args.concurrency)
+
+    async def cycle_tiktok(self):
+        async def fetch(username):
+            return await get_tt_status_async(username, self.status["tiktok"][username])
+
+        def handle(username, data):
+            if not data or data[1] is None:
+                return
+            self.transition("tiktok", username, data[0][0])
+
+        await poll_members(self.tt_users, fetch, handle, self.args.tiktok_concurrency)
+
+    async def run_platform(self, platform, cycle):
+        server = self.servers[platform]
+        for _ in range(self.args.cycles):
+            before = server.total_requests()
+            started = time.perf_counter()
+            await cycle()
+            elapsed = time.perf_counter() - started
+            self.cycles[platform].append((elapsed, server.total_requests() - before))
+            await asyncio.sleep(max(0, self.args.interval - elapsed))
+
+    def flip_members(self, stop):
+        # Setiap interval, `flips` member per platform berganti status pada waktu acak.
+        # Interval terakhir dibiarkan tenang supaya semua perubahan sempat terdeteksi
+        rng = random.Random(self.args.seed)
+        deadline = time.time() + max(0, self.args.cycles - 2) * self.args.interval
+        while not stop.is_set() and time.time() < deadline:
+            for platform in self.status:
+                sessions = self.servers[platform].sessions
+                # Member yang perubahannya belum terdeteksi tidak diubah lagi
+                candidates = [name for name, live in self.status[platform].items() if sessions.members[name]["live"] == live]
+                # Mulai dan selesai live diambil seimbang supaya jalur edit + crstlnz ikut teruji
+                live = [name for name in candidates if sessions.members[name]["live"]]
+                offline = [name for name in candidates if not sessions.members[name]["live"]]
+                for _ in range(self.args.flips):
+                    pool = live if (rng.random() < 0.5 and live) or not offline else offline
+                    if not pool:
+                        break
+                    name = pool.pop(rng.randrange(len(pool)))
+                    threading.Timer(rng.uniform(0, self.args.interval), sessions.toggle, (name,)).start()
+            stop.wait(self.args.interval)
+
+    async def run(self):
+        stop = threading.Event()
+        flipper = threading.Thread(target=self.flip_members, args=(stop,), daemon=True)
+        flipper.start()
+        await asyncio.gather(
+            self.run_platform("showroom", self.cycle_showroom),
+            self.run_platform("idn", self.cycle_idn),
+            self.run_platform("tiktok", self.cycle_tiktok),
+        )
+        stop.set()
+        flipper.join()
+
+        # Tunggu antrian Telegram kosong supaya latensi pengiriman lengkap
+        deadline = time.time() + 60
+        while sender.depth() and time.time() < deadline:
+            await asyncio.sleep(0.1)
+
+    def mismatches(self):
+        return {
+            platform: sum(1 for name, live in status.items() if self.servers[platform].sessions.members[name]["live"] != live)
+            for platform, status in self.status.items()
+        }
+
+    def report(self, members):
+        print(f"\n== {members} member per platform ==")
+        print(f"{'platform':<9} | {'siklus p50':>10} | {'siklus max':>10} | {'request/siklus':>14}")
+        for platform, rows in self.cycles.items():
+            times = [elapsed for elapsed, _ in rows]
+            requests = [count for _, count in rows]
+            print(f"{platform:<9} | {statistics.median(times):>9.3f}s | {max(times):>9.3f}s | {statistics.mean(requests):>14.1f}")
+
+        counts = ", ".join(f"{name} {server.total_requests()}" for name, server in self.servers.items())
+        print(f"total request: {counts}")
+        print(f"latensi deteksi   : {summarize(self.detected)}")
+        print(f"latensi pengiriman: {summarize(self.delivered)}")
+        print(f"history crstlnz   : {self.history_found} ditemukan, {self.history_missing} belum terindeks")
+        missed = self.mismatches()
+        if any(missed.values()):
+            print(f"PERINGATAN status berbeda dengan server: {missed}")
+
+
+def summarize(values):
+    if not values:
+        return "-"
+    values = sorted(values)
+    p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+    return f"n={len(values)} p50 {statistics.median(values):.2f}s p95 {p95:.2f}s max {values[-1]:.2f}s"
+
+
+async def main_async(args):
+    if args.no_rate_limit:
+        sender.GLOBAL_INTERVAL = sender.PRIVATE_CHAT_INTERVAL = sender.GROUP_CHAT_INTERVAL = 0
+
+    print(f"latency {args.latency * 1000:.0f} ms, error rate {args.error_rate:.0%}, live ratio {args.live_ratio:.0%}, "
+          f"listing +{args.listing_size}, {args.cycles} siklus @ {args.interval}s, {args.flips} perubahan/platform/interval")
+    for members in args.members:
+        run = Run(members, args)
+        run.start()
+        try:
+            await run.run()
+        finally:
+            run.stop()
+        run.report(members)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--members", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--live-ratio", type=float, default=0.1)
+    parser.add_argument("--listing-size", type=int, default=50, help="livestream non-member di listing Showroom/IDN")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--interval", type=float, default=2.0)
+    parser.add_argument("--flips", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--tiktok-concurrency", type=int, default=5)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--no-rate-limit", action="store_true", help="matikan jeda rate limit Telegram di sender")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+# Server tiruan upstream untuk benchmark/pengujian lokal, tanpa menyentuh platform asli.
+
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class FakeServer:
+    # Server HTTP lokal; `routes` memetakan path ke fungsi (path, query, body) -> (status, payload).
+    # Path berakhiran "*" dicocokkan sebagai awalan
+    def __init__(self, routes, latency=0.0, error_rate=0.0, seed=0):
+        self.routes = routes
+        self.latency = latency
+        self.error_rate = error_rate
+        self.counts = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self):
+                parts = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, payload = server.handle(parts.path, parse_qs(parts.query), body)
+                content = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = _serve
+            do_POST = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def total_requests(self):
+        return sum(self.counts.values())
+
+    def handle(self, path, query, body):
+        with self._lock:
+            self.counts[path] += 1
+            fail = self._random.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            return 500, {"error": "fake error"}
+
+        for prefix, route in self.routes.items():
+            if path == prefix or (prefix.endswith("*") and path.startswith(prefix[:-1])):
+                return route(path, query, body)
+        return 404, {"error": "not found"}
+
+
+
+
+def iso(timestamp):
+    # Epoch -> "2024-05-01T12:34:56.000Z" seperti format crstlnz/IDN
+    return time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(timestamp))
+
+
+class Sessions:
+    # Status live tiruan per member satu platform. Setiap kali live dimulai, sesi baru dibuat
+    # (room_id/slug baru); sesi yang selesai dicatat untuk feed recent crstlnz
+    def __init__(self, names, live_ratio, seed=0):
+        rng = random.Random(seed)
+        now = int(time.time())
+        self.members = {}
+        for index, name in enumerate(names):
+            live = rng.random() < live_ratio
+            started_at = now - rng.randint(60, 3600)
+            self.members[name] = {
+                "index": index,
+                "live": live,
+                "session": 1,
+                "started_at": started_at,
+                "ended_at": None if live else started_at + 30,
+                "viewers": rng.randint(100, 5000),
+            }
+        self.history = []
+        self.changed_at = {}
+        self._lock = threading.Lock()
+
+    def toggle(self, name):
+        with self._lock:
+            member = self.members[name]
+            now = time.time()
+            if member["live"]:
+                member["ended_at"] = int(now)
+                self.history.append(dict(member, name=name))
+            else:
+                member["session"] += 1
+                member["started_at"] = int(now)
+                member["ended_at"] = None
+            member["live"] = not member["live"]
+            self.changed_at[name] = now
+            return member["live"]
+
+    def live_names(self):
+        with self._lock:
+            return [name for name, member in self.members.items() if member["live"]]
+
+    def get(self, name):
+        with self._lock:
+            member = self.members.get(name)
+            return dict(member) if member else None
+
+
+def fake_showroom(room_count, live_ratio, listing_size=0, latency=0.0, error_rate=0.0, seed=0):
+    # Room 1..room_count, sebagian live sesuai `live_ratio`; `listing_size` room non-member
+    # ikut tampil di onlives seperti listing Showroom asli
+    sessions = Sessions(range(1, room_count + 1), live_ratio, seed)
+    now = int(time.time())
+    others = [
+        {"room_id": 900000 + i, "started_at": now - 600, "view_num": 100}
+        for i in range(listing_size)
+    ]
+
+    def profile(path, query, body):
+        room_id = int(query["room_id"][0])
+        room = sessions.get(room_id)
+        if room is None:
+            return 404, {"errors": [{"message": "room not found"}]}
+        return 200, {
+            "room_url_key": f"JKT48_Member{room_id}",
+            "is_onlive": room["live"],
+            "image": f"https://example.invalid/{room_id}.jpg",
+            "current_live_started_at": room["started_at"] if room["live"] else 0,
+            "share_url_live": f"https://www.showroom-live.com/r/JKT48_Member{room_id}?t=1",
+            "view_num": room["viewers"],
+            "premium_room_type": 0,
+        }
+
+    def onlives(path, query, body):
+        lives = [
+            {"room_id": room_id, "started_at": sessions.members[room_id]["started_at"], "view_num": sessions.members[room_id]["viewers"]}
+            for room_id in sessions.live_names()
+        ]
+        return 200, {"onlives": [{"genre_id": 102, "lives": lives + others}]}
+
+    def streaming_url(path, query, body):
+        room_id = query["room_id"][0]
+        return 200, {"streaming_url_list": [
+            {"type": "hls", "label": "original quality", "url": f"https://example.invalid/{room_id}.m3u8"}
+        ]}
+
+    server = FakeServer({
+        "/api/room/profile": profile,
+        "/api/live/onlives": onlives,
+        "/api/live/streaming_url": streaming_url,
+    }, latency=latency, error_rate=error_rate, seed=seed)
+    server.sessions = sessions
+    return server
+
+
+def idn_slug(name, member):
+    return f"{name}-live-{member['session']}"
+
+
+def fake_idn(usernames, live_ratio, listing_size=0, page_size=20, latency=0.0, error_rate=0.0, seed=0):
+    # GraphQL getLivestreams (berhalaman) + mobile-api livestream per slug.
+    # `listing_size` livestream non-member dicampur ke listing
+    sessions = Sessions(usernames, live_ratio, seed)
+    now = int(time.time())
+    others = [
+        {
+            "title": "Live",
+            "slug": f"other-{i}",
+            "image_url": "https://example.invalid/other.jpg",
+            "playback_url": f"https://example.invalid/other-{i}.m3u8",
+            "status": "live",
+            "live_at": iso(now - 600),
+            "creator": {"name": f"Other {i}", "username": f"other{i}"},
+        }
+        for i in range(listing_size)
+    ]
+
+    def livestream(name, member):
+        slug = idn_slug(name, member)
+        return {
+            "title": f"Live {name}",
+            "slug": slug,
+            "image_url": f"https://example.invalid/{slug}.jpg",
+            "playback_url": f"https://example.invalid/{slug}.m3u8",
+            "status": "live",
+            "live_at": iso(member["started_at"]),
+            "creator": {"name": name, "username": name},
+        }
+
+    def graphql(path, query, body):
+        page = json.loads(body or b"{}").get("variables", {}).get("page", 1)
+        listing = [livestream(name, sessions.get(name)) for name in sessions.live_names()]
+        # Member tersebar di antara livestream lain, urutan stabil dalam satu siklus
+        listing = sorted(listing + others, key=lambda item: item["slug"])
+        start = (page - 1) * page_size
+        return 200, {"data": {"getLivestreams": listing[start:start + page_size]}}
+
+    def infodata(path, query, body):
+        slug = path.rsplit("/", 1)[-1]
+        name, _, session = slug.rpartition("-live-")
+        member = sessions.get(name)
+        if member is None:
+            return 404, {"message": "not found"}
+        live = member["live"] and str(member["session"]) == session
+        return 200, {"data": {
+            "status": "live" if live else "end",
+            "title": f"Live {name}",
+            "image_url": f"https://example.invalid/{slug}.jpg",
+            "creator": {"name": name},
+            "view_count": member["viewers"],
+            "live_at": member["started_at"],
+            "end_at": int(time.time()) if live else (member["ended_at"] or member["started_at"]),
+            "playback_url": f"https://example.invalid/{slug}.m3u8",
+        }}
+
+    server = FakeServer({
+        "/graphql": graphql,
+        "/mobile-api/v3/livestream/*": infodata,
+    }, latency=latency, error_rate=error_rate, seed=seed)
+    server.sessions = sessions
+    return server
+
+
+def tiktok_room_id(member):
+    return f"{7000000 + member['index']}{member['session']:04d}"
+
+
+def fake_tiktok(usernames, live_ratio, latency=0.0, error_rate=0.0, seed=0):
+    # Halaman live (room_id di HTML), api-live/user/room, api/live/detail dan webcast room/info.
+    # Dipakai sebagai BASE_URL sekaligus WEBCAST_URL api.tiktok
+    sessions = Sessions(usernames, live_ratio, seed)
+    rooms = {}
+
+    def room(room_id):
+        name = rooms.get(room_id)
+        member = sessions.get(name) if name else None
+        if member is None or tiktok_room_id(member) != room_id:
+            # Room lama yang sudah diganti sesi baru dianggap selesai
+            return name, member, False
+        return name, member, member["live"]
+
+    def live_page(path, query, body):
+        name = path[2:].split("/", 1)[0]
+        member = sessions.get(name)
+        if member is None:
+            return 404, b""
+        room_id = tiktok_room_id(member)
+        rooms[room_id] = name
+        return 200, f'<html><meta property="al:android:url" content="snssdk1233://live?room_id={room_id}"/></html>'.encode()
+
+    def user_room(path, query, body):
+        name = query["uniqueId"][0]
+        member = sessions.get(name)
+        if member is None:
+            return 200, {"data": {}, "statusCode": 19881007}
+        room_id = tiktok_room_id(member)
+        rooms[room_id] = name
+        status = 2 if member["live"] else 4
+        return 200, {"data": {"user": {"roomId": room_id, "status": status}, "liveRoom": {"status": status}}, "statusCode": 0}
+
+    def live_detail(path, query, body):
+        room_id = query["roomID"][0]
+        name, member, live = room(room_id)
+        if member is None:
+            return 200, {"LiveRoomInfo": None}
+        return 200, {"LiveRoomInfo": {
+            "status": 2 if live else 4,
+            "coverUrl": f"https://example.invalid/{room_id}.jpg",
+            "title": f"Live {name}",
+            "ownerInfo": {"nickname": name},
+            "liveRoomStats": {"userCount": member["viewers"]},
+            "liveUrl": f"https://example.invalid/{room_id}.flv?token=1",
+        }}
+
+    def room_info(path, query, body):
+        room_id = query["room_id"][0]
+        name, member, live = room(room_id)
+        if member is None:
+            return 200, {"data": {}}
+        return 200, {"data": {
+            "stream_url": {"hls_pull_url": f"https://example.invalid/{room_id}.m3u8?token=1"},
+            "create_time": member["started_at"],
+            "finish_time": int(time.time()) if live else (member["ended_at"] or member["started_at"]),
+        }}
+
+    server = FakeServer({
+        "/@*": live_page,
+        "/api-live/user/room/": user_room,
+        "/api/live/detail/": live_detail,
+        "/webcast/room/info/": room_info,
+    }, latency=latency, error_rate=error_rate, seed=seed)
+    server.sessions = sessions
+    return server
+
+
+def fake_crstlnz(showroom_sessions=None, idn_sessions=None, latency=0.0, error_rate=0.0, seed=0):
+    # Feed /api/recent dari sesi yang sudah selesai di server Showroom/IDN tiruan
+    def recents(feed_type):
+        items = []
+        if feed_type == "showroom" and showroom_sessions is not None:
+            for session in showroom_sessions.history:
+                items.append({
+                    "data_id": f"sr-{session['name']}-{session['session']}",
+                    "room_id": session["name"],
+                    "live_info": {"date": {"start": iso(session["started_at"]), "end": iso(session["ended_at"])}},
+                })
+        if feed_type == "idn" and idn_sessions is not None:
+            for session in idn_sessions.history:
+                items.append({
+                    "data_id": f"idn-{session['name']}-{session['session']}",
+                    "room_id": session["index"],
+                    "live_info": {"date": {"start": iso(session["started_at"]), "end": iso(session["ended_at"])}},
+                    "idn": {"slug": idn_slug(session["name"], session)},
+                })
+        return list(reversed(items))
+
+    def recent(path, query, body):
+        feed_type = query.get("type", ["showroom"])[0]
+        perpage = int(query.get("perpage", ["50"])[0])
+        return 200, {"recents": recents(feed_type)[:perpage]}
+
+    def recent_detail(path, query, body):
+        data_id = path.rsplit("/", 1)[-1]
+        for feed_type in ("showroom", "idn"):
+            for item in recents(feed_type):
+                if item["data_id"] == data_id:
+                    return 200, dict(item, total_gifts=0, live_info=dict(
+                        item["live_info"],
+                        viewers={"num": 0, "active": 0},
+                        comments={"num": 0, "users": 0},
+                    ))
+        return 404, {"message": "not found"}
+
+    return FakeServer({
+        "/api/recent": recent,
+        "/api/recent/*": recent_detail,
+    }, latency=latency, error_rate=error_rate, seed=seed)
+
+
+def fake_telegram(token, latency=0.0, error_rate=0.0, seed=0):
+    # Bot API tiruan: setiap method dijawab dengan Message dan dicatat di `server.received`
+    # beserta waktu terimanya, untuk mengukur latensi pengiriman
+    message_ids = iter(range(1, 10 ** 9))
+    lock = threading.Lock()
+
+    def method(path, query, body):
+        name = path.rsplit("/", 1)[-1]
+        payload = json.loads(body or b"{}")
+        with lock:
+            message_id = payload.get("message_id") or next(message_ids)
+            server.received.append((time.time(), name, payload))
+        chat_id = payload.get("chat_id", 0)
+        return 200, {"ok": True, "result": {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id if isinstance(chat_id, int) else -100, "type": "channel"},
+            "caption": payload.get("caption"),
+        }}
+
+    server = FakeServer({f"/bot{token}/*": method}, latency=latency, error_rate=error_rate, seed=seed)
+    server.received = []
+    return server
@@ -0,0 +1,55 @@
+# Benchmark paginasi GraphQL IDN: waktu crawl vs jumlah halaman dan fanout.
+# Tidak menyentuh api.idn.app, setiap halaman disimulasikan dengan latency tetap.
+#
+#   python -m bench.idn_pagination --latency 0.15 --pages 1 3 6 12 --fanout 1 4 8
+
+import argparse
+import time
+
+from api.idn import crawl_livestreams
+
+
+def fake_fetch_page(total_pages, latency, per_page=20):
+    def fetch_page(page):
+        time.sleep(latency)
+        if page > total_pages:
+            return []
+        return [
+            {
+                "slug": f"slug-{page}-{i}",
+                "creator": {"username": f"user-{page}-{i}"},
+            }
+            for i in range(per_page)
+        ]
+
+    return fetch_page
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.15)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 3, 6, 12])
+    parser.add_argument("--fanout", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    print(f"latency per halaman: {args.latency * 1000:.0f} ms")
+    print(f"{'pages':>5} | " + " | ".join(f"fanout={f:<2} (s)" for f in args.fanout))
+    for total_pages in args.pages:
+        row = []
+        for fanout in args.fanout:
+            started = time.perf_counter()
+            livestreams = crawl_livestreams(fanout, fetch_page=fake_fetch_page(total_pages, args.latency))
+            elapsed = time.perf_counter() - started
+            assert len(livestreams) == total_pages * 20
+            row.append(f"{elapsed:>14.3f}")
+        print(f"{total_pages:>5} | " + " | ".join(row))
+
+    # Early stop: semua username yang dipantau ada di halaman pertama
+    total_pages = max(args.pages)
+    started = time.perf_counter()
+    crawl_livestreams(max(args.fanout), usernames=["user-1-0"], fetch_page=fake_fetch_page(total_pages, args.latency))
+    print(f"early stop ({total_pages} pages, fanout={max(args.fanout)}): {time.perf_counter() - started:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
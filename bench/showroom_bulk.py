@@ -0,0 +1,82 @@
+# Bandingkan deteksi live Showroom per-room (profile tiap room) vs bulk (onlives + profile
+# hanya untuk room yang berubah status) terhadap server Showroom tiruan.
+#
+#   python -m bench.showroom_bulk --rooms 100 --live-ratio 0.1 --latency 0.02
+
+import argparse
+import asyncio
+import time
+
+import api.cache
+import api.showroom
+from api.showroom import check_profile_live_status_async, get_onlives_async, changed_rooms
+from bench.fake_servers import fake_showroom
+from scheduler import poll_members
+
+
+async def run_cycle(room_ids, last_status, bulk, concurrency):
+    targets = room_ids
+    if bulk:
+        onlives = await get_onlives_async()
+        if onlives is not None:
+            targets = changed_rooms(room_ids, onlives, last_status)
+
+    def handle(room_id, profile):
+        if profile is not None:
+            last_status[room_id] = profile[1]
+
+    await poll_members(targets, check_profile_live_status_async, handle, concurrency)
+
+
+async def run_mode(server, room_ids, bulk, cycles, concurrency):
+    last_status = {room_id: False for room_id in room_ids}
+    rows = []
+    for cycle in range(cycles):
+        # Siklus ketiga: satu room berganti status supaya jalur transisi ikut teruji
+        if cycle == 2:
+            server.sessions.toggle(room_ids[0])
+
+        # Siklus asli berjarak 60 detik, lebih lama dari TTL cache respons
+        api.cache.clear()
+        before = server.total_requests()
+        started = time.perf_counter()
+        await run_cycle(room_ids, last_status, bulk, concurrency)
+        rows.append((cycle + 1, server.total_requests() - before, time.perf_counter() - started))
+
+        expected = set(server.sessions.live_names())
+        detected = {room_id for room_id, live in last_status.items() if live}
+        assert detected == expected, f"siklus {cycle + 1}: deteksi berbeda ({len(detected)} vs {len(expected)})"
+
+    # Kembalikan status room pertama untuk mode berikutnya
+    if cycles > 2:
+        server.sessions.toggle(room_ids[0])
+    return rows
+
+
+async def main_async(args):
+    server = fake_showroom(args.rooms, args.live_ratio, latency=args.latency)
+    api.showroom.BASE_URL = server.start()
+    room_ids = list(range(1, args.rooms + 1))
+    try:
+        for bulk in (False, True):
+            rows = await run_mode(server, room_ids, bulk, args.cycles, args.concurrency)
+            print(f"mode {'bulk' if bulk else 'per-room'}:")
+            for cycle, requests, elapsed in rows:
+                print(f"  siklus {cycle}: {requests:>5} request, {elapsed:.3f} s")
+    finally:
+        server.stop()
+    print("deteksi identik di kedua mode")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--live-ratio", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--cycles", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=10)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
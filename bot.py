@@ -1,46 +1,54 @@
+import startup
+import html
 import json
 import os
-import httpx
 import threading
 import time
-import pytz
 import locale
-from telegram import Update, Bot, InlineKeyboardButton, InlineKeyboardMarkup
+from io import BytesIO
+from logging import getLogger, WARNING
+
+import config
+import logs
+
+# Log JSON lewat antrian, dirotasi dan dikompres (lihat logs.py)
+logs.setup()
+
+# Memuat .env dari GitHub Gist (lewat cache lokal, divalidasi ulang di background).
+# Hanya CONFIG_FILE_URL, CONFIG_CACHE dan LOG_* yang harus diset di environment proses;
+# variabel lain (termasuk STATE_DB, SHARDING, WORKER_ID) boleh diisi dari gist
+config.load()
+startup.mark("config")
+
+# Modul di bawah membaca variabel .env saat diimpor, jadi diimpor setelah config.load()
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Updater, CommandHandler, CallbackContext
-from datetime import datetime
-from io import StringIO
-from logging import getLogger, basicConfig, INFO, WARNING
-from dotenv import load_dotenv
 
-from api.showroom import get_streaming_url, check_profile_live_status, get_history_live, get_id_history
-from api.idn import get_livestreams, get_infodata, get_id_history_idn, get_history_live_idn
-from api.tiktok import get_tt_room_id, is_user_tt_live, get_tt_stream_url
+from api.client import get_client
+import api.cache as api_cache
+import api.retry as api_retry
+from api.showroom import get_streaming_url, check_profile_live_status_async, get_onlives_async, changed_rooms, get_history_live, get_id_history
+from api.idn import get_livestreams, get_livestreams_snapshot_async, get_infodata_async, get_id_history_idn, get_history_live_idn
+from api.tiktok import get_tt_status_async
+from scheduler import poll_members, start_engine
+import deferred
+import events
+import store
+import adaptive
+import shard
+import snapshot
+import sender
+import metrics
+import notify
+import web
+import wib
 
 # set locale
 locale.setlocale(locale.LC_ALL, 'id_ID.UTF-8')
 
-# Konfigurasi logger
-basicConfig(
-    filename="log.txt",
-    format="{asctime} - [{levelname[0]}] {name} [{module}:{lineno}] - {message}",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    style="{",
-    level=INFO
-)
-
 LOGGER = getLogger(__name__)
 getLogger("httpx").setLevel(WARNING)
-
-# Mendapatkan isi dari file .env di GitHub Gist
-CONFIG_FILE_URL = os.getenv("CONFIG_FILE_URL", "")
-response = httpx.get(CONFIG_FILE_URL)
-env_content = response.text
-
-# Membuat buffer string dan menulis isi .env ke dalamnya
-env_buffer = StringIO(env_content)
-
-# Memuat variabel dari buffer menggunakan load_dotenv
-load_dotenv(stream=env_buffer)
+startup.mark("imports")
 
 # Mengambil nilai variabel dari file .env
 TOKEN = os.getenv("TOKEN")
@@ -55,34 +63,67 @@ ROOM_IDS = json.loads(os.getenv("ROOM_IDS"))
 IDN_USERS = json.loads(os.getenv("IDN_USERS"))
 TT_USERS = json.loads(os.getenv("TT_USERS"))
 TT_USERS_OTHERS = json.loads(os.getenv("TT_USERS_OTHERS"))
-
+# Member TikTok dipolling sekali walaupun ada di kedua daftar
+TT_ALL_USERS = list(dict.fromkeys(TT_USERS + TT_USERS_OTHERS))
+
+# Tujuan tambahan untuk pesan live, mis. [{"platform": "tiktok", "chat_id": "-100123", "members": ["user"]}].
+# Tanpa "members" semua member platform dikirim ke tujuan tersebut
+NOTIFY_ROUTES = json.loads(os.getenv("NOTIFY_ROUTES", "[]"))
+
+# Caption pesan live diperbarui (penonton saat ini dan puncak) paling sering sekali per jendela ini
+LIVE_EDIT_WINDOW = int(os.getenv("LIVE_EDIT_WINDOW", 120))
+
+# Jumlah baris /log tanpa argumen dan batas maksimalnya
+LOG_TAIL_DEFAULT = 50
+LOG_TAIL_MAX = 5000
+# Batas panjang satu pesan Telegram; /log yang lebih panjang dikirim sebagai file
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+# Jumlah halaman GraphQL IDN yang diambil paralel per jendela
+IDN_PAGE_FANOUT = int(os.getenv("IDN_PAGE_FANOUT", 4))
+
+# Batas request bersamaan per platform untuk poller asyncio
+SHOWROOM_CONCURRENCY = int(os.getenv("SHOWROOM_CONCURRENCY", 10))
+IDN_CONCURRENCY = int(os.getenv("IDN_CONCURRENCY", 10))
+TIKTOK_CONCURRENCY = int(os.getenv("TIKTOK_CONCURRENCY", 5))
+
+# Deteksi live Showroom lewat satu request onlives per siklus
+SHOWROOM_BULK = os.getenv("SHOWROOM_BULK", "true").lower() in ("1", "true", "yes")
+
+# Interval polling adaptif per member: cepat saat live/jam live biasa, mundur sampai batas saat dorman
+ADAPTIVE_POLLING = os.getenv("ADAPTIVE_POLLING", "true").lower() in ("1", "true", "yes")
+SHOWROOM_INTERVAL = int(os.getenv("SHOWROOM_INTERVAL", 60))
+IDN_INTERVAL = int(os.getenv("IDN_INTERVAL", 60))
+# Tanpa polling adaptif semua member TikTok dicek setiap siklus, jadi tetap 120 detik seperti
+# semula; dengan polling adaptif member dorman sudah dimundurkan sehingga base bisa 60 detik
+TIKTOK_INTERVAL = int(os.getenv("TIKTOK_INTERVAL", 60 if ADAPTIVE_POLLING else 120))
+ADAPTIVE_MAX_INTERVAL = int(os.getenv("ADAPTIVE_MAX_INTERVAL", 900))
+
+# Mode sharding (SHARDING=true, lihat shard.py): hanya satu worker yang melayani webhook
+# Telegram dan perintah bot, worker lain cukup memolling bagian membernya
+RUN_WEBHOOK = os.getenv("RUN_WEBHOOK", "true").lower() in ("1", "true", "yes")
+
+# State dimuat dari store (SQLite) supaya restart tidak mengumumkan ulang live yang sedang
+# berjalan; setiap perubahan ditulis ulang ke store di akhir siklus polling
 # Inisialisasi last_live_status dan last_live_status_idn
-last_live_status = {room_id: False for room_id in ROOM_IDS}
-last_live_status_idn = {channel_username: False for channel_username in IDN_USERS}
-last_live_status_tiktok = {tiktok_username: False for tiktok_username in TT_USERS + TT_USERS_OTHERS}
+last_live_status = store.PersistentDict("last_live_status", {room_id: False for room_id in ROOM_IDS})
+last_live_status_idn = store.PersistentDict("last_live_status_idn", {channel_username: False for channel_username in IDN_USERS})
+last_live_status_tiktok = store.PersistentDict("last_live_status_tiktok", {tiktok_username: False for tiktok_username in TT_ALL_USERS})
 # Inisialisasi dictionary untuk menyimpan slug
-live_streams_slug_idn = {}
-# Menyimpan view live terakhir untuk setiap pengguna TikTok
-last_user_count_tiktok = {}
+live_streams_slug_idn = store.PersistentDict("live_streams_slug_idn")
 # menyimpan waktu mulai showroom
-last_live_showroom_started_at = {}
-# Simpan ID pesan yang dikirimkan saat live sedang berlangsung SR
-sent_message_ids_sr = {}
-# Simpan ID pesan yang dikirimkan saat live sedang berlangsung IDN
-sent_message_ids_idn = {}
-# Simpan ID pesan yang dikirimkan saat live sedang berlangsung TT
-sent_message_ids_tt = {}
-# Simpan waktu_mulai SR
-last_waktu_mulai_sr = {}
-# Simpan view_num SR
-last_view_num_sr = {}
-
-# Timezone
-jakarta_timezone = pytz.timezone('Asia/Jakarta')
-jakarta_timezone_now = datetime.now(jakarta_timezone).strftime("%A, %d %b %Y | %H:%M:%S WIB")
-hari_jakarta = datetime.now(jakarta_timezone).strftime("%A")
-tanggal_jakarta = datetime.now(jakarta_timezone).strftime("%d %B %Y")
-waktu_jakarta = datetime.now(jakarta_timezone).strftime("%H:%M:%S WIB")
+last_live_showroom_started_at = store.PersistentDict("last_live_showroom_started_at")
+
+# Tabel routing pesan live: setiap event dikirim ke semua tujuan yang cocok
+notify.EDIT_WINDOW = LIVE_EDIT_WINDOW
+# Setiap transisi live juga diterbitkan ke aliran event lokal /events
+notify.subscribe(events.publish)
+notify.route("showroom", CHANNEL_ID)
+notify.route("idn", CHANNEL_ID)
+notify.route("tiktok", CHANNEL_ID, TT_USERS)
+notify.route("tiktok", CHAT_ID, TT_USERS_OTHERS)
+for extra_route in NOTIFY_ROUTES:
+    notify.route(extra_route["platform"], extra_route["chat_id"], extra_route.get("members"))
 
 def start(update: Update, context: CallbackContext) -> None:
     # Memeriksa ID pengguna yang mengirim permintaan
@@ -98,27 +139,28 @@ def start(update: Update, context: CallbackContext) -> None:
                                   'Silahkan angkat kaki anda dari sini!',
                                   reply_markup=reply_markup)
 
-def pesan_showroom(room_id):
-    cek_live_sr = check_profile_live_status(room_id)
+def pesan_showroom(room_id, cek_live_sr):
     if cek_live_sr is not None:
-        room_url_key, is_onlive, image, current_live_started_at, share_url_live, view_num, is_premium = cek_live_sr
-        
+        room_url_key = cek_live_sr.room_url_key
+        is_onlive = cek_live_sr.is_onlive
+        current_live_started_at = cek_live_sr.started_at
+
         # slicing room_url_key to get member name
         if room_url_key == "officialJKT48":
             name_member = "JKT48 Official SHOWROOM"
         else:
             name_member = room_url_key.split('_')[1] + " " + room_url_key.split('_')[0]
         
-        if '?' in share_url_live:
-            base_url = share_url_live.split('?')
+        if '?' in cek_live_sr.share_url:
+            base_url = cek_live_sr.share_url.split('?')
             link_url_showroom = base_url[0]
 
-        if is_onlive and not last_live_status[room_id]:
+        if is_onlive and not last_live_status[room_id] and shard.claim(f"showroom:{room_id}:start:{current_live_started_at}"):
             streaming_url = get_streaming_url(room_id)
-            
-            waktu_mulai = datetime.fromtimestamp(current_live_started_at, tz=pytz.utc).astimezone(jakarta_timezone).strftime("%A, %d %b %Y | %H:%M:%S WIB")
 
-            if is_premium:
+            waktu_mulai = wib.format_wib(current_live_started_at)
+
+            if cek_live_sr.is_premium:
                 reply_markup = InlineKeyboardMarkup([
                     [
                         InlineKeyboardButton("Showroom", url=f"{link_url_showroom}")
@@ -145,380 +187,343 @@ def pesan_showroom(room_id):
                     f"⚡ Streaming URL: {streaming_link}"
                 )
 
-            pesan = send_photo_and_text_to_channel(image, message, reply_markup)
-            sent_message_ids_sr[room_id] = pesan.message_id
+            notify.publish(notify.Event("start", "showroom", room_id, name_member, current_live_started_at, message, cek_live_sr.image, reply_markup))
+            catat_lag("showroom", current_live_started_at)
+            snapshot.start("showroom", room_id, name_member, current_live_started_at)
+            catat_penonton("showroom", room_id, cek_live_sr.view_num)
 
-            last_waktu_mulai_sr[room_id] = waktu_mulai
-            last_view_num_sr[room_id] = view_num
             last_live_showroom_started_at[room_id] = current_live_started_at
+        elif is_onlive and last_live_status[room_id]:
+            catat_penonton("showroom", room_id, cek_live_sr.view_num)
         elif not is_onlive and last_live_status[room_id]:
             current_live_started_at = last_live_showroom_started_at.get(room_id)
-            if current_live_started_at:
-                data_id = get_id_history(room_id, current_live_started_at)
-                if data_id is not None:
-                    result = get_history_live(data_id)
-                    if result is not None:
-                        waktu_mulai_history, waktu_selesai_history, durasi, viewers, active_viewers, total_gifts, comments, users_comments, rupiah_gold = result
-
-                        waktu_mulai_history_without_z = waktu_mulai_history.replace("Z", "")
-                        waktu_selesai_history_without_z = waktu_selesai_history.replace("Z", "")
-
-                        waktu_mulai_jakarta = datetime.fromisoformat(waktu_mulai_history_without_z).astimezone(jakarta_timezone).strftime("%A, %d %b %Y | %H:%M:%S WIB")
-                        waktu_selesai_jakarta = datetime.fromisoformat(waktu_selesai_history_without_z).astimezone(jakarta_timezone).strftime("%A, %d %b %Y | %H:%M:%S WIB")
-
-                        formatted_rupiah_gold = locale.currency(rupiah_gold, grouping=True, symbol=True)
-                        formatted_rupiah_gold = formatted_rupiah_gold.replace('Rp', 'Rp. ')
-
-                        message = (
-                            f"<b>{name_member}</b> telah selesai live{'!' if room_url_key=='officialJKT48' else ' <b>Showroom</b>.'}\n\n"
-                            f"🕙 Durasi live: <b>{durasi}</b>\n"
-                            f"⚡ Mulai: <b>{waktu_mulai_jakarta}</b>\n"
-                            f"⚡ Selesai: <b>{waktu_selesai_jakarta}</b>\n"
-                            f"👥 <b>{viewers}</b> dari <b>{active_viewers}</b> Penonton aktif\n"
-                            f"💬 <b>{comments}</b> dari <b>{users_comments}</b> Pengguna\n"
-                            f"🎁 <b>{total_gifts}G (± {formatted_rupiah_gold})</b>"
-                        )
-
-                        pesan_id = sent_message_ids_sr.get(room_id)
-                        if pesan_id:
-                            edit_photo_and_text_in_channel(message, pesan_id)
-
-                else:
-                    waktu_mulai_sr = last_waktu_mulai_sr.get(room_id)
-                    waktu_selesai_sr = jakarta_timezone_now
-
-                    # Ambil waktu mulai
-                    start_time = datetime.strptime(waktu_mulai_sr, "%A, %d %b %Y | %H:%M:%S WIB")
-                    end_time = datetime.strptime(waktu_selesai_sr, "%A, %d %b %Y | %H:%M:%S WIB")
-
-                    # Hitung durasi
-                    duration = end_time - start_time
-
-                    # Konversi durasi ke dalam detik
-                    total_seconds = duration.total_seconds()
-
-                    # Hitung jam, menit, dan detik
-                    hours = int(total_seconds // 3600)
-                    minutes = int((total_seconds % 3600) // 60)
-                    seconds = int(total_seconds % 60)
-
-                    # Format durasi
-                    formatted_duration = "{:02}:{:02}:{:02}".format(hours, minutes, seconds)
-
-                    message = (
-                            f"<b>{name_member}</b> telah selesai live{'!' if room_url_key=='officialJKT48' else ' <b>Showroom</b>.'}\n\n"
-                            f"🕙 Durasi live: <b>{formatted_duration}</b>\n"
-                            f"⚡ Mulai: <b>{waktu_mulai_sr}</b>\n"
-                            f"⚡ Selesai: <b>{waktu_selesai_sr}</b>\n"
-                            f"👥 <b>{last_view_num_sr[room_id]}</b>"
-                        )
-
-                    pesan_id = sent_message_ids_sr.get(room_id)
-                    if pesan_id:
-                        edit_photo_and_text_in_channel(message, pesan_id)
-
-                    del last_waktu_mulai_sr[room_id]
-                    del last_view_num_sr[room_id]
+            if current_live_started_at and shard.claim(f"showroom:{room_id}:end:{current_live_started_at}"):
+                ended_at = wib.now()
+                pesan_ids = notify.publish(notify.Event("end", "showroom", room_id, name_member, ended_at))
+                if pesan_ids:
+                    # Ringkasan crstlnz diambil lewat antrian deferred supaya polling tidak tertahan
+                    deferred.enqueue("history_showroom", {
+                        "room_id": room_id,
+                        "room_url_key": room_url_key,
+                        "name_member": name_member,
+                        "started_at": current_live_started_at,
+                        "ended_at": ended_at,
+                        "view_num": puncak_penonton("showroom", room_id),
+                        "message_ids": pesan_ids,
+                    }, shard_key=f"showroom:{room_id}")
+            snapshot.end("showroom", room_id)
         last_live_status[room_id] = is_onlive
 
-def pesan_idn(channel_username):
-    slug = get_livestreams(channel_username)
+def history_showroom(task):
+    data_id = get_id_history(task["room_id"], task["started_at"])
+    if data_id is None:
+        return False
+
+    result = get_history_live(data_id)
+    if result is None:
+        return False
+
+    message = (
+        f"<b>{task['name_member']}</b> telah selesai live{'!' if task['room_url_key']=='officialJKT48' else ' <b>Showroom</b>.'}\n\n"
+        + format_history(result)
+    )
+
+    notify.edit(task["message_ids"], message)
+    return True
+
+def history_showroom_fallback(task):
+    # crstlnz tidak mengindeks live sampai deadline, pakai data dari polling
+    started_at, ended_at = task["started_at"], task["ended_at"]
+
+    message = (
+            f"<b>{task['name_member']}</b> telah selesai live{'!' if task['room_url_key']=='officialJKT48' else ' <b>Showroom</b>.'}\n\n"
+            f"🕙 Durasi live: <b>{wib.format_duration(ended_at - started_at)}</b>\n"
+            f"⚡ Mulai: <b>{wib.format_wib(started_at)}</b>\n"
+            f"⚡ Selesai: <b>{wib.format_wib(ended_at)}</b>\n"
+            f"👥 <b>{format_angka(task['view_num'])}</b>"
+        )
+
+    notify.edit(task["message_ids"], message)
+
+def pesan_idn(channel_username, snapshot_idn, data_info):
+    slug = get_livestreams(channel_username, snapshot_idn)
     if slug:
-        data_info = get_infodata(slug)
         if data_info:
-            title, name, view_count, durasi_live, live_at_jakarta, end_at_jakarta, playback_url, is_status_online, image_url = data_info
-
-            if is_status_online and not last_live_status_idn.get(channel_username, False):
-                title_quote = f"<blockquote>{title}</blockquote>"
-                streaming_link = f"<pre>{playback_url}</pre>"
+            title = data_info.title
+            playback_url = data_info.playback_url
 
-                reply_markup = InlineKeyboardMarkup([
-                    [
-                        InlineKeyboardButton("IDN APP", url=f"https://app.idn.media/?link=https://links.idn.media?type%3Dlive%26url%26slug%3D{slug}"),
-                        InlineKeyboardButton("IDN WEB", url=f"https://www.idn.app/{channel_username}/live/{slug}")
-                    ],
-                    [InlineKeyboardButton("Fullscreen", url=f"https://player3.piobot.us.to/player/#{playback_url}")]
-                ])
+            if data_info.is_live and not last_live_status_idn.get(channel_username, False):
+                if shard.claim(f"idn:{channel_username}:start:{slug}"):
+                    title_quote = f"<blockquote>{title}</blockquote>"
+                    streaming_link = f"<pre>{playback_url}</pre>"
+
+                    reply_markup = InlineKeyboardMarkup([
+                        [
+                            InlineKeyboardButton("IDN APP", url=f"https://app.idn.media/?link=https://links.idn.media?type%3Dlive%26url%26slug%3D{slug}"),
+                            InlineKeyboardButton("IDN WEB", url=f"https://www.idn.app/{channel_username}/live/{slug}")
+                        ],
+                        [InlineKeyboardButton("Fullscreen", url=f"https://player3.piobot.us.to/player/#{playback_url}")]
+                    ])
                 
-                message = (
-                    f"<b>{name}</b> sedang live <b>IDN</b>.\n\n"
-                    f"{title_quote}\n"
-                    f"🗓️ {live_at_jakarta}\n"
-                    f"⚡ Streaming URL: {streaming_link}"
-                )
+                    message = (
+                        f"<b>{data_info.name}</b> sedang live <b>IDN</b>.\n\n"
+                        f"{title_quote}\n"
+                        f"🗓️ {wib.format_wib(data_info.live_at)}\n"
+                        f"⚡ Streaming URL: {streaming_link}"
+                    )
                 
-                pesan = send_photo_and_text_to_channel(image_url, message, reply_markup)
-                sent_message_ids_idn[channel_username] = pesan.message_id
+                    notify.publish(notify.Event("start", "idn", channel_username, data_info.name, data_info.live_at, message, data_info.image_url, reply_markup))
+                    catat_lag("idn", (snapshot_idn.get(channel_username) or {}).get("live_at"))
+                    snapshot.start("idn", channel_username, data_info.name, data_info.live_at)
+                    catat_penonton("idn", channel_username, data_info.view_count)
 
                 last_live_status_idn[channel_username] = True
+            elif data_info.is_live:
+                catat_penonton("idn", channel_username, data_info.view_count)
         live_streams_slug_idn[channel_username] = slug
     else:
-        # Jika tidak ada slug, lanjutkan dengan slug sebelumnya
+        # Jika tidak ada slug, lanjutkan dengan slug sebelumnya. Tanpa data_info (timeout,
+        # error, circuit breaker terbuka) slug dan status dibiarkan untuk polling berikutnya
         slug = live_streams_slug_idn.get(channel_username)
-        if slug:
-            data_info = get_infodata(slug)
-            if data_info:
-                title, name, view_count, durasi_live, live_at_jakarta, end_at_jakarta, playback_url, is_status_online, image_url = data_info
-                if not is_status_online and last_live_status_idn.get(channel_username, False):
-                    last_live_status_idn[channel_username] = False
-
-                    data_id = get_id_history_idn(slug)
-                    if data_id:
-                        result = get_history_live_idn(data_id)
-                        if result is not None:
-                            waktu_mulai_jakarta, waktu_selesai_jakarta, durasi, viewers, active_viewers, total_gifts, comments, users_comments, rupiah_gold = result
-                            title_quote = f"<blockquote>{title}</blockquote>"
-
-                            formatted_rupiah_gold = locale.currency(rupiah_gold, grouping=True, symbol=True)
-                            formatted_rupiah_gold = formatted_rupiah_gold.replace('Rp', 'Rp. ')
-
-                            message = (
-                                f"<b>{name}</b> telah selesai live <b>IDN</b>.\n\n"
-                                f"{title_quote}\n"
-                                f"🕙 Durasi live: <b>{durasi}</b>\n"
-                                f"⚡ Mulai: <b>{waktu_mulai_jakarta}</b>\n"
-                                f"⚡ Selesai: <b>{waktu_selesai_jakarta}</b>\n"
-                                f"👥 <b>{view_count}</b> dari <b>{active_viewers}</b> Penonton aktif\n"
-                                f"💬 <b>{comments}</b> dari <b>{users_comments}</b> Pengguna\n"
-                                f"🎁 <b>{total_gifts}G (± {formatted_rupiah_gold})</b>"
-                            )
-
-                            pesan_id = sent_message_ids_idn.get(channel_username)
-                            if pesan_id:
-                                edit_photo_and_text_in_channel(message, pesan_id)
-                    else:
-                        title_quote = f"<blockquote>{title}</blockquote>"
-
-                        message = (
-                            f"<b>{name}</b> telah selesai live <b>IDN</b>.\n\n"
-                            f"{title_quote}\n"
-                            f"🕙 Durasi live: <b>{durasi_live}</b>\n"
-                            f"⚡ Mulai: <b>{live_at_jakarta}</b>\n"
-                            f"⚡ Selesai: <b>{end_at_jakarta}</b>\n"
-                            f"👥 <b>{view_count}</b>"
-                        )
-
-                        pesan_id = sent_message_ids_idn.get(channel_username)
-                        if pesan_id:
-                            edit_photo_and_text_in_channel(message, pesan_id)
-
+        if slug and data_info and not data_info.is_live:
+            if last_live_status_idn.get(channel_username, False):
+                last_live_status_idn[channel_username] = False
+                snapshot.end("idn", channel_username)
+
+                if shard.claim(f"idn:{channel_username}:end:{slug}"):
+                    pesan_ids = notify.publish(notify.Event("end", "idn", channel_username, data_info.name, data_info.end_at))
+                    if pesan_ids:
+                        # Ringkasan crstlnz diambil lewat antrian deferred supaya polling tidak tertahan
+                        deferred.enqueue("history_idn", {
+                            "slug": slug,
+                            "name": data_info.name,
+                            "title": data_info.title,
+                            "view_count": data_info.view_count,
+                            "live_at": data_info.live_at,
+                            "end_at": data_info.end_at,
+                            "message_ids": pesan_ids,
+                        }, shard_key=f"idn:{channel_username}")
+
+            # Live sudah selesai, slug tidak dipakai lagi
             del live_streams_slug_idn[channel_username]
 
-def pesan_tiktok(tiktok_username):
-    room_id = get_tt_room_id(tiktok_username)
-    if room_id:
-        is_tt_live = is_user_tt_live(room_id)
+def history_idn(task):
+    data_id = get_id_history_idn(task["slug"])
+    if not data_id:
+        return False
+
+    result = get_history_live_idn(data_id)
+    if result is None:
+        return False
+
+    title_quote = f"<blockquote>{task['title']}</blockquote>"
+
+    # Jumlah penonton IDN dari polling terakhir, crstlnz hanya untuk penonton aktif dan gift
+    message = (
+        f"<b>{task['name']}</b> telah selesai live <b>IDN</b>.\n\n"
+        f"{title_quote}\n"
+        + format_history(result._replace(viewers=task['view_count']))
+    )
+
+    notify.edit(task["message_ids"], message)
+    return True
+
+def history_idn_fallback(task):
+    # crstlnz tidak mengindeks live sampai deadline, pakai data dari IDN
+    title_quote = f"<blockquote>{task['title']}</blockquote>"
+
+    durasi_live = wib.format_duration(task["end_at"] - task["live_at"])
+    live_at, end_at = wib.format_wib(task["live_at"]), wib.format_wib(task["end_at"])
+
+    message = (
+        f"<b>{task['name']}</b> telah selesai live <b>IDN</b>.\n\n"
+        f"{title_quote}\n"
+        f"🕙 Durasi live: <b>{durasi_live}</b>\n"
+        f"⚡ Mulai: <b>{live_at}</b>\n"
+        f"⚡ Selesai: <b>{end_at}</b>\n"
+        f"👥 <b>{format_angka(task['view_count'])}</b>"
+    )
+
+    notify.edit(task["message_ids"], message)
+
+def pesan_tiktok(tiktok_username, data_tiktok):
+    # Satu polling per member; tujuan pesan (channel dan/atau chat pribadi) dari tabel routing
+    if data_tiktok:
+        is_tt_live, data_tt_stream_url = data_tiktok
         if is_tt_live:
-            is_online, cover_url, title, nickname, userCount, liveUrl = is_tt_live
-            data_tt_stream_url = get_tt_stream_url(room_id)
+            is_online = is_tt_live.is_online
+            title = is_tt_live.title
+            nickname = is_tt_live.nickname
+            liveUrl = is_tt_live.live_url
+            if is_online and last_live_status_tiktok[tiktok_username]:
+                # Live masih berjalan: stream url hanya diambil saat status berubah, jadi
+                # penonton dicatat dari status live di setiap polling
+                catat_penonton("tiktok", tiktok_username, is_tt_live.user_count)
             if data_tt_stream_url:
-                stream_url, create_time, finish_time = data_tt_stream_url
-                
-                if is_online and not last_live_status_tiktok[tiktok_username]:
-                    title_quote = f"<blockquote>{title}</blockquote>"
-
-                    if stream_url:
-                        reply_markup = InlineKeyboardMarkup([
-                            [
-                                InlineKeyboardButton("Tiktok", url=f"https://www.tiktok.com/@{tiktok_username}/live"),
-                                InlineKeyboardButton("Fullscreen", url=f"https://player3.piobot.us.to/player/#{stream_url}")
-                            ]
-                        ])
-                        message = (
-                            f"<b>{nickname}</b> sedang live <b>Tiktok</b>.\n\n"
-                            f"{title_quote}\n"
-                            f"🗓️ {create_time}\n"
-                            f"⚡ Streaming URL: <pre>{stream_url}</pre>"
-                        )
-                    else:
-                        reply_markup = InlineKeyboardMarkup([
-                            [
-                                InlineKeyboardButton("Tiktok", url=f"https://www.tiktok.com/@{tiktok_username}/live"),
-                                InlineKeyboardButton("Fullscreen", url=f"https://player3.piobot.us.to/player/#{liveUrl}")
-                            ]
-                        ])
-                        message = (
-                            f"<b>{nickname}</b> sedang live <b>Tiktok</b>.\n\n"
-                            f"{title_quote}\n"
-                            f"🗓️ {create_time}\n"
-                            f"⚡ Streaming URL: <pre>{liveUrl}</pre>"
-                        )
-                    
-                    pesan = send_photo_and_text_to_channel(cover_url, message, reply_markup)
-                    sent_message_ids_tt[tiktok_username] = pesan.message_id
-
-                    last_user_count_tiktok[tiktok_username] = userCount
-                elif not is_online and last_live_status_tiktok[tiktok_username]:
-                    stream_url, create_time, finish_time = data_tt_stream_url
-                    title_quote = f"<blockquote>{title}</blockquote>"
-
-                    # Ambil waktu mulai
-                    start_time = datetime.strptime(create_time, "%A, %d %b %Y | %H:%M:%S WIB")
-                    end_time = datetime.strptime(finish_time, "%A, %d %b %Y | %H:%M:%S WIB")
-
-                    # Hitung durasi
-                    duration = end_time - start_time
-
-                    # Konversi durasi ke dalam detik
-                    total_seconds = duration.total_seconds()
-
-                    # Hitung jam, menit, dan detik
-                    hours = int(total_seconds // 3600)
-                    minutes = int((total_seconds % 3600) // 60)
-                    seconds = int(total_seconds % 60)
-
-                    # Format durasi
-                    formatted_duration = "{:02}:{:02}:{:02}".format(hours, minutes, seconds)
+                stream_url = data_tt_stream_url.stream_url or liveUrl
+                create_time = data_tt_stream_url.create_time
+                title_quote = f"<blockquote>{title}</blockquote>"
 
+                if is_online and not last_live_status_tiktok[tiktok_username] and shard.claim(f"tiktok:{tiktok_username}:start:{create_time}"):
+                    reply_markup = InlineKeyboardMarkup([
+                        [
+                            InlineKeyboardButton("Tiktok", url=f"https://www.tiktok.com/@{tiktok_username}/live"),
+                            InlineKeyboardButton("Fullscreen", url=f"https://player3.piobot.us.to/player/#{stream_url}")
+                        ]
+                    ])
                     message = (
-                        f"<b>{nickname}</b> telah selesai live <b>Tiktok</b>.\n\n"
+                        f"<b>{nickname}</b> sedang live <b>Tiktok</b>.\n\n"
                         f"{title_quote}\n"
-                        f"🕙 Durasi live: <b>{formatted_duration}</b>\n"
-                        f"⚡ Mulai: <b>{create_time}</b>\n"
-                        f"⚡ Selesai: <b>{finish_time}</b>\n"
-                        f"👥 <b>± {last_user_count_tiktok[tiktok_username]}</b>"
+                        f"🗓️ {wib.format_wib(create_time)}\n"
+                        f"⚡ Streaming URL: <pre>{stream_url}</pre>"
                     )
 
-                    pesan_id = sent_message_ids_tt.get(tiktok_username)
-                    if pesan_id:
-                        edit_photo_and_text_in_channel(message, pesan_id)
-                    
-                    del last_user_count_tiktok[tiktok_username]
-                last_live_status_tiktok[tiktok_username] = is_online
-
-def pesan_tiktok_private(tiktok_username):
-    room_id = get_tt_room_id(tiktok_username)
-    if room_id:
-        is_tt_live = is_user_tt_live(room_id)
-        if is_tt_live:
-            is_online, cover_url, title, nickname, userCount, liveUrl = is_tt_live
-            data_tt_stream_url = get_tt_stream_url(room_id)
-            if data_tt_stream_url:
-                stream_url, create_time, finish_time = data_tt_stream_url
-                if is_online and not last_live_status_tiktok[tiktok_username]:
-                    title_quote = f"<blockquote>{title}</blockquote>"
-                    
-                    if stream_url:
-                        reply_markup = InlineKeyboardMarkup([
-                            [
-                                InlineKeyboardButton("Tiktok", url=f"https://www.tiktok.com/@{tiktok_username}/live"),
-                                InlineKeyboardButton("Fullscreen", url=f"https://player3.piobot.us.to/player/#{stream_url}")
-                            ]
-                        ])
-                        message = (
-                            f"<b>{nickname}</b> sedang live <b>Tiktok</b>.\n\n"
-                            f"{title_quote}\n"
-                            f"🗓️ {create_time}\n"
-                            f"⚡ Streaming URL: <pre>{stream_url}</pre>"
-                        )
-                    else:
-                        reply_markup = InlineKeyboardMarkup([
-                            [
-                                InlineKeyboardButton("Tiktok", url=f"https://www.tiktok.com/@{tiktok_username}/live"),
-                                InlineKeyboardButton("Fullscreen", url=f"https://player3.piobot.us.to/player/#{liveUrl}")
-                            ]
-                        ])
-                        message = (
-                            f"<b>{nickname}</b> sedang live <b>Tiktok</b>.\n\n"
-                            f"{title_quote}\n"
-                            f"🗓️ {create_time}\n"
-                            f"⚡ Streaming URL: <pre>{liveUrl}</pre>"
-                        )
-                    
-                    pesan = send_photo_and_text_to_user(cover_url, message, reply_markup)
-                    sent_message_ids_tt[tiktok_username] = pesan.message_id
-
-                    last_user_count_tiktok[tiktok_username] = userCount
-                elif not is_online and last_live_status_tiktok[tiktok_username]:
-                    stream_url, create_time, finish_time = data_tt_stream_url
-                    title_quote = f"<blockquote>{title}</blockquote>"
-
-                    start_time = datetime.strptime(create_time, "%A, %d %b %Y | %H:%M:%S WIB")
-                    end_time = datetime.strptime(finish_time, "%A, %d %b %Y | %H:%M:%S WIB")
-
-                    duration = end_time - start_time
-
-                    total_seconds = duration.total_seconds()
-
-                    hours = int(total_seconds // 3600)
-                    minutes = int((total_seconds % 3600) // 60)
-                    seconds = int(total_seconds % 60)
-
-                    formatted_duration = "{:02}:{:02}:{:02}".format(hours, minutes, seconds)
+                    notify.publish(notify.Event("start", "tiktok", tiktok_username, nickname, create_time, message, is_tt_live.cover_url, reply_markup))
+                    catat_lag("tiktok", create_time)
+                    snapshot.start("tiktok", tiktok_username, nickname, create_time)
+                    catat_penonton("tiktok", tiktok_username, is_tt_live.user_count)
+                elif not is_online and last_live_status_tiktok[tiktok_username] and shard.claim(f"tiktok:{tiktok_username}:end:{create_time}"):
+                    finish_time = data_tt_stream_url.finish_time
 
                     message = (
                         f"<b>{nickname}</b> telah selesai live <b>Tiktok</b>.\n\n"
                         f"{title_quote}\n"
-                        f"🕙 Durasi live: <b>{formatted_duration}</b>\n"
-                        f"⚡ Mulai: <b>{create_time}</b>\n"  # Gunakan waktu mulai asli
-                        f"⚡ Selesai: <b>{finish_time}</b>\n"
-                        f"👥 <b>± {last_user_count_tiktok[tiktok_username]}</b>"
+                        f"🕙 Durasi live: <b>{wib.format_duration(finish_time - create_time)}</b>\n"
+                        f"⚡ Mulai: <b>{wib.format_wib(create_time)}</b>\n"
+                        f"⚡ Selesai: <b>{wib.format_wib(finish_time)}</b>\n"
+                        f"👥 <b>± {format_angka(puncak_penonton('tiktok', tiktok_username))}</b> (puncak)"
                     )
 
-                    pesan_id = sent_message_ids_tt.get(tiktok_username)
-                    if pesan_id:
-                        edit_photo_and_text_in_user(message, pesan_id)
-
-                    del last_user_count_tiktok[tiktok_username]
+                    notify.publish(notify.Event("end", "tiktok", tiktok_username, nickname, finish_time, message))
                 last_live_status_tiktok[tiktok_username] = is_online
 
+def format_angka(angka):
+    # Angka mentah dari api -> "1.234"
+    return '{:,.0f}'.format(angka).replace(',', '.')
+
+def format_rupiah(nilai):
+    return locale.currency(nilai, grouping=True, symbol=True).replace('Rp', 'Rp. ')
+
+def format_history(history):
+    # Bagian ringkasan crstlnz (durasi, waktu, penonton, komentar, gift) pesan akhir live
+    return (
+        f"🕙 Durasi live: <b>{wib.format_duration(history.ended - history.started)}</b>\n"
+        f"⚡ Mulai: <b>{wib.format_wib(history.started)}</b>\n"
+        f"⚡ Selesai: <b>{wib.format_wib(history.ended)}</b>\n"
+        f"👥 <b>{format_angka(history.viewers)}</b> dari <b>{format_angka(history.active_viewers)}</b> Penonton aktif\n"
+        f"💬 <b>{format_angka(history.comments)}</b> dari <b>{format_angka(history.users_comments)}</b> Pengguna\n"
+        f"🎁 <b>{format_angka(history.total_gifts)}G (± {format_rupiah(history.gold_rupiah)})</b>"
+    )
+
+def catat_lag(platform, started_at):
+    # Jeda antara live dimulai dan terdeteksi bot, diekspor lewat /metrics
+    if started_at is None:
+        return
+    try:
+        if isinstance(started_at, str):
+            started_at = wib.parse_iso(started_at)
+        lag = max(0.0, wib.now() - started_at)
+        metrics.observe("piobot_detection_lag_seconds", lag, {"platform": platform}, metrics.LAG_BUCKETS)
+    except (TypeError, ValueError) as e:
+        LOGGER.warning(f"Error hitung lag {platform}: {e}")
+
+def catat_penonton(platform, member, count):
+    # Simpan penonton saat ini/puncak lalu perbarui caption pesan live (digabung oleh notify)
+    if count is None:
+        return
+    current, peak = snapshot.viewers(platform, member, count)
+    notify.update(platform, member, f"\n👥 <b>{format_angka(current)}</b> penonton (puncak <b>{format_angka(peak)}</b>)")
+
+def puncak_penonton(platform, member):
+    # Live selesai: keluarkan dari snapshot dan pakai puncak penonton untuk pesan akhir
+    live = snapshot.end(platform, member)
+    return (live or {}).get("peak") or 0
+
+def queue_depths():
+    depths = {(("queue", "telegram"),): sender.depth(), (("queue", "store"),): store.pending_writes()}
+    for kind, count in deferred.depth().items():
+        depths[(("queue", "deferred"), ("kind", kind))] = count
+    return depths
+
+# Kirim/edit lewat antrian sender (satu Bot, rate limit Telegram), tidak memblokir poller.
+# Pesan live dikirim lewat notify (routing ke semua tujuan)
 def send_to_channel(text: str):
-    bot = Bot(token=TOKEN)
-    bot.send_message(chat_id=CHANNEL_ID, text=text, parse_mode='HTML')
+    return sender.submit("send_message", CHANNEL_ID, text=text, parse_mode='HTML')
 
 def send_to_user(text: str):
-    bot = Bot(token=TOKEN)
-    bot.send_message(chat_id=CHAT_ID, text=text, parse_mode='HTML')
-
-# send to channel
-def send_photo_and_text_to_channel(photo: str, text: str, reply_markup: InlineKeyboardMarkup):
-    bot = Bot(token=TOKEN)
-    message = bot.send_photo(chat_id=CHANNEL_ID, photo=photo, caption=text, reply_markup=reply_markup, parse_mode='HTML')
-    return message
-
-# edit in channel
-def edit_photo_and_text_in_channel(text: str, message_id: int):
-    bot = Bot(token=TOKEN)
-    bot.edit_message_caption(chat_id=CHANNEL_ID, message_id=message_id, caption=text, reply_markup=None, parse_mode='HTML')
-
-# send to user
-def send_photo_and_text_to_user(photo: str, text: str, reply_markup: InlineKeyboardMarkup):
-    bot = Bot(token=TOKEN)
-    message = bot.send_photo(chat_id=CHAT_ID, photo=photo, caption=text, reply_markup=reply_markup, parse_mode='HTML')
-    return message
-
-# edit in user
-def edit_photo_and_text_in_user(text: str, message_id: int):
-    bot = Bot(token=TOKEN)
-    bot.edit_message_caption(chat_id=CHAT_ID, message_id=message_id, caption=text, reply_markup=None, parse_mode='HTML')
-
-def job_showroom():
-    while True:
-        for room_id in ROOM_IDS:
-            pesan_showroom(room_id)
-        time.sleep(60)
+    return sender.submit("send_message", CHAT_ID, text=text, parse_mode='HTML')
+
+async def fetch_tiktok(tiktok_username):
+    return await get_tt_status_async(tiktok_username, last_live_status_tiktok[tiktok_username])
+
+def due_members(platform, members, started):
+    if ADAPTIVE_POLLING:
+        return adaptive.due(platform, members, started)
+    return members
+
+def observe_members(platform, members, status, polled, base, started):
+    # Jadwal berikutnya dihitung dari awal siklus (`started`), bukan dari akhir polling
+    adaptive.observe(platform, members, status, polled, base, ADAPTIVE_MAX_INTERVAL if ADAPTIVE_POLLING else base, started)
+
+async def cycle_showroom():
+    started = time.time()
+    # Mode sharding: hanya member milik worker ini yang dipolling
+    own_room_ids = shard.partition("showroom", ROOM_IDS)
+    room_ids = None
+    onlives = None
+    if SHOWROOM_BULK:
+        # Profile hanya diambil untuk room yang berubah status (image, share_url, premium)
+        onlives = await get_onlives_async()
+        if onlives is not None:
+            room_ids = changed_rooms(own_room_ids, onlives, last_live_status)
+    if room_ids is None:
+        room_ids = due_members("showroom", own_room_ids, started)
+
+    await poll_members(room_ids, check_profile_live_status_async, pesan_showroom, SHOWROOM_CONCURRENCY)
+    observe_members("showroom", own_room_ids, last_live_status, room_ids, SHOWROOM_INTERVAL, started)
+
+    if onlives is not None:
+        # Room yang masih live tidak dicek profile-nya, penonton diambil dari listing onlives
+        polled = set(room_ids)
+        for room_id in own_room_ids:
+            live = onlives.get(str(room_id))
+            if live and room_id not in polled and last_live_status.get(room_id):
+                catat_penonton("showroom", room_id, live["view_num"])
+
+async def cycle_idn():
+    started = time.time()
+    idn_users = shard.partition("idn", IDN_USERS)
+    # Crawl listing IDN sekali per siklus, lalu lookup per member dari index
+    snapshot_idn = await get_livestreams_snapshot_async(IDN_PAGE_FANOUT, idn_users)
+    if snapshot_idn is None:
+        # Listing gagal (halaman error / circuit breaker terbuka): jangan dianggap kosong,
+        # slug dan status live dibiarkan sampai siklus berikutnya berhasil
+        LOGGER.warning("Listing IDN tidak tersedia, siklus IDN dilewati")
+        return
+
+    async def fetch_idn(channel_username):
+        # Slug dari snapshot, atau slug sebelumnya untuk mendeteksi live yang sudah selesai
+        slug = get_livestreams(channel_username, snapshot_idn) or live_streams_slug_idn.get(channel_username)
+        if slug:
+            return await get_infodata_async(slug)
 
-def job_idn():
-    while True:
-        for channel_username in IDN_USERS:
-            pesan_idn(channel_username)
-        time.sleep(60)
+    def handle_idn(channel_username, data_info):
+        pesan_idn(channel_username, snapshot_idn, data_info)
 
-def job_tiktok():
-    while True:
-        for tiktok_username in TT_USERS:
-            pesan_tiktok(tiktok_username)
-        time.sleep(120)
+    await poll_members(idn_users, fetch_idn, handle_idn, IDN_CONCURRENCY)
+    # Listing IDN selalu mencakup semua member, profil aktivitas hanya dicatat untuk riwayat
+    observe_members("idn", idn_users, last_live_status_idn, idn_users, IDN_INTERVAL, started)
 
-def job_tiktok_others():
-    while True:
-        for tiktok_username in TT_USERS_OTHERS:
-            pesan_tiktok_private(tiktok_username)
-        time.sleep(120)
+async def cycle_tiktok():
+    started = time.time()
+    own_users = shard.partition("tiktok", TT_ALL_USERS)
+    tiktok_users = due_members("tiktok", own_users, started)
+    await poll_members(tiktok_users, fetch_tiktok, pesan_tiktok, TIKTOK_CONCURRENCY)
+    observe_members("tiktok", own_users, last_live_status_tiktok, tiktok_users, TIKTOK_INTERVAL, started)
 
 def job_send_request():
     while True:
-        httpx.get(
+        get_client(HEROKU_APP_URL).get(
             HEROKU_APP_URL,
             headers = {
                 "User-Agent": "Not a RoBot"
@@ -541,7 +546,7 @@ def restart(update: Update, context: CallbackContext) -> None:
             time.sleep(5)
             context.bot.deleteMessage(chat_id = update.message.chat_id,
                                        message_id = message.message_id)
-            httpx.delete(url, headers=headers)
+            get_client(url).delete(url, headers=headers)
         except Exception as e:
             print(e)
             update.message.reply_text("Failed to restart Heroku app. Please try again later.")
@@ -558,10 +563,135 @@ def log(update: Update, context: CallbackContext) -> None:
     # Memeriksa ID pengguna yang mengirim perintah
     chat_id = update.effective_chat.id
     if chat_id == CHAT_ID:
-        # Membuat file log Heroku
-        with open('log.txt', 'rb') as log_file:
-            # Mengirim file log ke CHAT_ID
-            context.bot.send_document(chat_id=CHAT_ID, document=log_file)
+        # /log [n]: hanya n baris terakhir, dibaca dari akhir file
+        try:
+            jumlah = min(max(int(context.args[0]), 1), LOG_TAIL_MAX) if context.args else LOG_TAIL_DEFAULT
+        except ValueError:
+            jumlah = LOG_TAIL_DEFAULT
+        try:
+            lines = [logs.render(line) for line in logs.tail(jumlah)]
+        except OSError as e:
+            update.message.reply_text(f"Log tidak bisa dibaca: {e}")
+            return
+
+        text = "\n".join(lines) or "(log kosong)"
+        # Panjang dihitung setelah escape (<, >, & jadi lebih panjang) termasuk pembungkus <pre>
+        pesan = f"<pre>{html.escape(text)}</pre>"
+        if len(pesan) <= TELEGRAM_MESSAGE_LIMIT:
+            update.message.reply_text(pesan, parse_mode='HTML')
+        else:
+            # Terlalu panjang untuk satu pesan, kirim sebagai file berisi baris-baris yang sama
+            document = BytesIO(text.encode("utf-8"))
+            document.name = f"log-{jumlah}.txt"
+            context.bot.send_document(chat_id=CHAT_ID, document=document)
+    else:
+        # Membuat tombol yang mengarah ke Anda sebagai pemilik
+        reply_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("Owner Telegram", url="https://t.me/pranendra")]
+        ])
+        update.message.reply_text('Maaf, Anda tidak memiliki izin untuk mengakses bot ini.\n'
+                                  'Silahkan angkat kaki anda dari sini!',
+                                  reply_markup=reply_markup)
+
+PLATFORM_LABEL = {"showroom": "Showroom", "idn": "IDN", "tiktok": "Tiktok"}
+
+def format_live(lives, sekarang):
+    if not lives:
+        return "Tidak ada member yang sedang live."
+    lines = [f"<b>Sedang live</b> ({len(lives)})\n"]
+    for live in lives:
+        line = f"\n• <b>{html.escape(str(live['name']))}</b> di {PLATFORM_LABEL.get(live['platform'], live['platform'])}"
+        if live.get("started_at"):
+            line += f"\n   🗓️ {wib.format_clock(live['started_at'])} WIB, durasi {wib.format_duration(sekarang - live['started_at'])}"
+        if live.get("viewers") is not None:
+            line += f"\n   👥 {format_angka(live['viewers'])} penonton (puncak {format_angka(live['peak'])})"
+        lines.append(line)
+    return "".join(lines)
+
+def live(update: Update, context: CallbackContext) -> None:
+    # Dijawab dari snapshot poller (tanpa request ke upstream) di thread dispatcher,
+    # jadi siklus polling yang lambat tidak menunda balasan
+    chat_id = update.effective_chat.id
+    if chat_id == CHAT_ID:
+        update.message.reply_text(format_live(snapshot.current(), wib.now()), parse_mode='HTML')
+    else:
+        # Membuat tombol yang mengarah ke Anda sebagai pemilik
+        reply_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("Owner Telegram", url="https://t.me/pranendra")]
+        ])
+        update.message.reply_text('Maaf, Anda tidak memiliki izin untuk mengakses bot ini.\n'
+                                  'Silahkan angkat kaki anda dari sini!',
+                                  reply_markup=reply_markup)
+
+def queue(update: Update, context: CallbackContext) -> None:
+    chat_id = update.effective_chat.id
+    if chat_id == CHAT_ID:
+        tasks = deferred.pending()
+        lines = [f"Antrian deferred: <b>{len(tasks)}</b>"]
+        for task in tasks:
+            next_run = wib.format_clock(task["next_run"])
+            lines.append(f"• {task['kind']} percobaan {task['attempt']}, berikutnya {next_run}")
+        update.message.reply_text("\n".join(lines), parse_mode='HTML')
+    else:
+        # Membuat tombol yang mengarah ke Anda sebagai pemilik
+        reply_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("Owner Telegram", url="https://t.me/pranendra")]
+        ])
+        update.message.reply_text('Maaf, Anda tidak memiliki izin untuk mengakses bot ini.\n'
+                                  'Silahkan angkat kaki anda dari sini!',
+                                  reply_markup=reply_markup)
+
+def format_breakers():
+    states = api_retry.breaker_states()
+    if not states:
+        return "<b>Circuit breaker</b>: belum ada request"
+    lines = ["<b>Circuit breaker</b>\n<pre>"]
+    for host, state in sorted(states.items()):
+        line = f"{host:<22}: {state['state']}, gagal {state['failures']}, trip {state['trips']}"
+        if state["state"] == "open":
+            line += f", sisa {state['cooldown_remaining']:.0f}s"
+        lines.append(line + "\n")
+    lines.append("</pre>")
+    return "".join(lines)
+
+def format_shard():
+    if not shard.SHARDING:
+        return ""
+    workers = shard.workers()
+    owned = {
+        worker: sum(
+            1
+            for platform, members in (("showroom", ROOM_IDS), ("idn", IDN_USERS), ("tiktok", TT_ALL_USERS))
+            for member in members
+            if shard.owner(f"{platform}:{member}") == worker
+        )
+        for worker in workers
+    }
+    lines = [f"<b>Shard</b> ({len(workers)} worker)\n<pre>"]
+    for worker in workers:
+        lines.append(f"{worker:<22}: {owned[worker]} member{' (ini)' if worker == shard.WORKER_ID else ''}\n")
+    lines.append("</pre>\n")
+    return "".join(lines)
+
+def stats(update: Update, context: CallbackContext) -> None:
+    chat_id = update.effective_chat.id
+    if chat_id == CHAT_ID:
+        cache_stats = api_cache.stats()
+        total = cache_stats["hits"] + cache_stats["misses"] + cache_stats["coalesced"]
+        hit_rate = (cache_stats["hits"] + cache_stats["coalesced"]) / total * 100 if total else 0
+
+        update.message.reply_text("<b>Statistik bot</b>\n<pre>"
+                                  f"Cache hit       : {cache_stats['hits']}\n"
+                                  f"Cache miss      : {cache_stats['misses']}\n"
+                                  f"Digabung        : {cache_stats['coalesced']}\n"
+                                  f"Hit rate        : {hit_rate:.1f}%\n"
+                                  f"Entri cache     : {cache_stats['size']}\n"
+                                  f"Antrian deferred: {sum(deferred.depth().values())}\n"
+                                  f"Antrian Telegram: {sender.depth()}</pre>\n"
+                                  f"<b>Cold start</b>: {startup.report()}\n"
+                                  + format_shard()
+                                  + format_breakers(),
+                                  parse_mode='HTML')
     else:
         # Membuat tombol yang mengarah ke Anda sebagai pemilik
         reply_markup = InlineKeyboardMarkup([
@@ -572,6 +702,8 @@ def log(update: Update, context: CallbackContext) -> None:
                                   reply_markup=reply_markup)
 
 def main() -> None:
+    # State dari store, tabel routing dan konstanta modul sudah dimuat
+    startup.mark("setup")
     updater = Updater(TOKEN, use_context=True)
 
     dispatcher = updater.dispatcher
@@ -579,25 +711,49 @@ def main() -> None:
     dispatcher.add_handler(CommandHandler("start", start))
     dispatcher.add_handler(CommandHandler(["restart", "r"], restart))
     dispatcher.add_handler(CommandHandler(["log", "l"], log))
-
-    updater.start_webhook(listen="0.0.0.0", port=int(PORT), url_path=TOKEN, webhook_url=HEROKU_APP_URL + TOKEN)
-
-    send_to_user("<b>Bot berhasil dimulai ulang!</b>\n<pre>"
-                 f"Hari    : {hari_jakarta}\n"
-                 f"Tanggal : {tanggal_jakarta}\n"
-                 f"Waktu   : {waktu_jakarta}</pre>")
-    send_to_channel("<b>Bot berhasil dimulai ulang!</b>\n<pre>"
-                    f"Hari    : {hari_jakarta}\n"
-                    f"Tanggal : {tanggal_jakarta}\n"
-                    f"Waktu   : {waktu_jakarta}</pre>")
-    LOGGER.info('Bot telah dimulai!')
-
-    # Menjalankan job() dalam thread terpisah
-    threading.Thread(target=job_showroom).start()
-    threading.Thread(target=job_idn).start()
-    threading.Thread(target=job_tiktok).start()
-    threading.Thread(target=job_tiktok_others).start()
-    threading.Thread(target=job_send_request).start() 
+    dispatcher.add_handler(CommandHandler("live", live, run_async=True))
+    dispatcher.add_handler(CommandHandler(["queue", "q"], queue))
+    dispatcher.add_handler(CommandHandler(["stats", "s"], stats))
+
+    # Satu Bot untuk semua pesan keluar, dikirim lewat antrian ber-rate-limit
+    sender.init(updater.bot)
+
+    # Bergabung ke ring shard sebelum polling supaya pembagian member sudah diketahui
+    shard.start()
+
+    metrics.gauge("piobot_queue_depth", queue_depths)
+    if RUN_WEBHOOK:
+        updater.start_webhook(listen="0.0.0.0", port=int(PORT), url_path=TOKEN, webhook_url=HEROKU_APP_URL + TOKEN)
+        startup.mark("webhook")
+
+        # Endpoint Prometheus dan aliran event (SSE) di port webhook yang sama
+        web.add_routes(updater, [(r"/metrics", web.MetricsHandler), (r"/events", web.EventStreamHandler)])
+
+        sekarang = wib.now()
+        pesan_restart = ("<b>Bot berhasil dimulai ulang!</b>\n<pre>"
+                         f"Hari    : {wib.format_day(sekarang)}\n"
+                         f"Tanggal : {wib.format_date(sekarang)}\n"
+                         f"Waktu   : {wib.format_clock(sekarang)} WIB</pre>")
+        send_to_user(pesan_restart)
+        send_to_channel(pesan_restart)
+    LOGGER.info(f'Bot telah dimulai! (worker {shard.WORKER_ID})' if shard.SHARDING else 'Bot telah dimulai!')
+
+    # Ringkasan akhir live yang tertunda (termasuk dari sebelum restart)
+    deferred.register("history_showroom", history_showroom, history_showroom_fallback)
+    deferred.register("history_idn", history_idn, history_idn_fallback)
+    deferred.start_worker()
+
+    # Menjalankan poller asyncio di thread terpisah, Updater tetap melayani webhook
+    jobs = [
+        ("showroom", SHOWROOM_INTERVAL, cycle_showroom),
+        ("idn", IDN_INTERVAL, cycle_idn),
+        ("tiktok", TIKTOK_INTERVAL, cycle_tiktok),
+    ]
+    # Rincian cold start dicatat ke log setelah semua platform selesai polling pertama
+    startup.expect(name for name, _, _ in jobs)
+    start_engine(jobs, after_cycle=store.flush, first_cycle=startup.cycle_done)
+    if RUN_WEBHOOK:
+        threading.Thread(target=job_send_request).start()
 
 if __name__ == '__main__':
     main()
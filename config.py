@@ -0,0 +1,111 @@
+import json
+import os
+import threading
+import time
+from io import StringIO
+from logging import getLogger
+
+import httpx
+from dotenv import load_dotenv
+
+LOGGER = getLogger(__name__)
+
+# File .env diambil dari GitHub Gist (CONFIG_FILE_URL). Salinan lokal disimpan supaya boot
+# tidak menunggu jaringan: jika cache ada, variabel dimuat dari cache lalu gist divalidasi
+# ulang di background (If-None-Match/If-Modified-Since). Perubahan berlaku saat restart
+# berikutnya. Tanpa cache (boot pertama) gist diambil langsung.
+# CONFIG_FILE_URL dan CONFIG_CACHE dibaca sebelum gist dimuat, jadi harus diset di
+# environment proses, bukan di gist.
+CONFIG_FILE_URL = os.getenv("CONFIG_FILE_URL", "")
+CONFIG_CACHE = os.getenv("CONFIG_CACHE", ".env.cache")
+FETCH_TIMEOUT = 10
+
+
+def _meta_path():
+    return CONFIG_CACHE + ".json"
+
+
+def _read_cache():
+    try:
+        with open(CONFIG_CACHE, encoding="utf-8") as cache_file:
+            content = cache_file.read()
+    except OSError:
+        return None, {}
+    try:
+        with open(_meta_path(), encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+    except (OSError, ValueError):
+        meta = {}
+    return content, meta
+
+
+def _write_cache(content, meta):
+    # Tulis ke file sementara lalu rename supaya proses lain tidak membaca cache setengah jadi
+    for path, data in ((CONFIG_CACHE, content), (_meta_path(), json.dumps(meta))):
+        temp = f"{path}.tmp"
+        with open(temp, "w", encoding="utf-8") as temp_file:
+            temp_file.write(data)
+        os.replace(temp, path)
+
+
+def fetch(meta=None):
+    # Kembalikan (isi, meta) jika gist berubah, (None, meta) jika 304 Not Modified
+    meta = meta or {}
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    response = httpx.get(CONFIG_FILE_URL, headers=headers, timeout=FETCH_TIMEOUT, follow_redirects=True)
+    if response.status_code == 304:
+        return None, dict(meta, checked_at=time.time())
+    response.raise_for_status()
+    return response.text, {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "checked_at": time.time(),
+    }
+
+
+def revalidate(current=None, meta=None):
+    if current is None:
+        current, meta = _read_cache()
+    try:
+        content, meta = fetch(meta)
+    except Exception as e:
+        LOGGER.warning(f"Error validasi ulang config: {e}")
+        return False
+    changed = content is not None and content != current
+    try:
+        _write_cache(current if content is None else content, meta)
+    except OSError as e:
+        LOGGER.warning(f"Error tulis cache config: {e}")
+    if changed:
+        LOGGER.info("Config di gist berubah, berlaku setelah restart")
+    return changed
+
+
+def load(background=True):
+    # Muat .env ke os.environ. `background=False` untuk proses singkat (update.py) yang
+    # tidak sempat menunggu validasi ulang selesai
+    content, meta = _read_cache()
+    if content is None:
+        try:
+            content, meta = fetch()
+        except Exception as e:
+            LOGGER.error(f"Config tidak bisa diambil dan belum ada cache: {e}")
+            return False
+        try:
+            _write_cache(content, meta)
+        except OSError as e:
+            LOGGER.warning(f"Error tulis cache config: {e}")
+        source = "gist"
+    else:
+        source = "cache"
+        if background:
+            threading.Thread(target=revalidate, args=(content, meta), name="config", daemon=True).start()
+
+    load_dotenv(stream=StringIO(content))
+    LOGGER.info(f"Config dimuat dari {source}")
+    return True
@@ -0,0 +1,131 @@
+import threading
+import time
+import uuid
+from logging import getLogger
+
+import shard
+import store
+
+LOGGER = getLogger(__name__)
+
+# Antrian tugas tertunda (mis. menunggu crstlnz mengindeks live yang baru selesai).
+# Disimpan di state store supaya tugas yang belum selesai tetap jalan setelah restart
+
+# Jeda (detik) sebelum percobaan ke-n, percobaan berikutnya memakai nilai terakhir
+RETRY_SCHEDULE = (30, 30, 60, 60, 120, 300)
+DEFAULT_DEADLINE = 2 * 60 * 60
+
+_handlers = {}
+_tasks = store.PersistentDict("deferred")
+_lock = threading.Lock()
+_wakeup = threading.Event()
+
+
+def register(kind, resolve, expire=None):
+    # `resolve(payload)` mengembalikan True jika selesai, False untuk dicoba lagi.
+    # `expire(payload)` dipanggil sekali jika deadline lewat sebelum berhasil
+    _handlers[kind] = (resolve, expire)
+
+
+def enqueue(kind, payload, deadline=DEFAULT_DEADLINE, delay=None, shard_key=None):
+    # `shard_key` ("platform:member") menentukan worker yang menjalankan tugas di mode sharding
+    now = time.time()
+    task = {
+        "id": uuid.uuid4().hex,
+        "kind": kind,
+        "shard_key": shard_key,
+        "payload": payload,
+        "attempt": 0,
+        "next_run": now + (RETRY_SCHEDULE[0] if delay is None else delay),
+        "deadline": now + deadline,
+    }
+    with _lock:
+        # Ditulis bersama flush store di akhir siklus polling
+        _tasks[task["id"]] = task
+    LOGGER.info(f"Deferred {kind} ditambahkan, antrian: {len(_tasks)}")
+    _wakeup.set()
+    return task["id"]
+
+
+def depth():
+    with _lock:
+        counts = {}
+        for task in _tasks.values():
+            counts[task["kind"]] = counts.get(task["kind"], 0) + 1
+        return counts
+
+
+def pending():
+    with _lock:
+        return sorted((dict(task) for task in _tasks.values()), key=lambda task: task["next_run"])
+
+
+def _finish(task):
+    with _lock:
+        _tasks.pop(task["id"], None)
+    store.flush()
+
+
+def _reschedule(task):
+    with _lock:
+        task["attempt"] += 1
+        delay = RETRY_SCHEDULE[min(task["attempt"], len(RETRY_SCHEDULE) - 1)]
+        task["next_run"] = time.time() + delay
+        _tasks[task["id"]] = task
+    store.flush()
+
+
+def _run(task):
+    resolve, expire = _handlers.get(task["kind"], (None, None))
+    if resolve is None:
+        LOGGER.warning(f"Deferred {task['kind']} tidak punya handler, dibuang")
+        _finish(task)
+        return
+
+    if time.time() >= task["deadline"]:
+        LOGGER.info(f"Deferred {task['kind']} melewati deadline setelah {task['attempt']} percobaan")
+        try:
+            if expire is not None:
+                expire(task["payload"])
+        except Exception as e:
+            LOGGER.warning(f"Error expire deferred {task['kind']}: {e}")
+        _finish(task)
+        return
+
+    try:
+        done = resolve(task["payload"])
+    except Exception as e:
+        LOGGER.warning(f"Error deferred {task['kind']}: {e}")
+        done = False
+
+    if done:
+        _finish(task)
+    else:
+        _reschedule(task)
+
+
+def run_worker():
+    while True:
+        with _lock:
+            now = time.time()
+            owned = [task for task in _tasks.values() if shard.owns_key(task.get("shard_key"))]
+            due = [task for task in owned if task["next_run"] <= now or task["deadline"] <= now]
+            upcoming = min((min(task["next_run"], task["deadline"]) for task in owned), default=None)
+
+        for task in sorted(due, key=lambda task: task["next_run"]):
+            _run(task)
+
+        if not due:
+            timeout = None if upcoming is None else max(0, upcoming - time.time())
+            _wakeup.wait(timeout)
+            _wakeup.clear()
+
+
+def start_worker():
+    # Tugas dari worker yang keluar dari ring ikut dimuat saat rebalance
+    shard.on_rebalance(_wakeup.set)
+    if _tasks:
+        LOGGER.info(f"Deferred dimuat dari state store: {len(_tasks)} tugas")
+    thread = threading.Thread(target=run_worker, name="deferred", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,57 @@
+import json
+import threading
+import time
+from collections import deque
+
+# Aliran event transisi live (mulai/selesai) untuk konsumen lokal (dashboard, recorder)
+# lewat Server-Sent Events di port webhook. Event terakhir disimpan di ring buffer
+# supaya klien yang tersambung ulang bisa melanjutkan dari Last-Event-ID tanpa celah.
+BUFFER_SIZE = 1000
+
+_lock = threading.Lock()
+_buffer = deque(maxlen=BUFFER_SIZE)
+# ID dimulai dari waktu boot (ms) supaya tetap naik setelah restart
+_next_id = int(time.time() * 1000)
+_listeners = []
+
+
+def subscribe(callback):
+    # `callback()` dipanggil (dari thread penerbit) setiap ada event baru
+    _listeners.append(callback)
+
+
+def publish(event):
+    # `event` adalah notify.Event; hanya field data yang diteruskan, bukan caption/tombol
+    global _next_id
+    data = {
+        "type": f"live.{event.kind}",
+        "platform": event.platform,
+        "member": event.member,
+        "name": event.name,
+        "at": event.at,
+    }
+    if event.photo:
+        data["photo"] = event.photo
+    with _lock:
+        _next_id += 1
+        data["id"] = _next_id
+        _buffer.append((_next_id, data["type"], json.dumps(data, ensure_ascii=False)))
+    for callback in _listeners:
+        callback()
+    return data
+
+
+def since(last_id):
+    # Event setelah `last_id`. Jika `last_id` sudah keluar dari buffer, kirim semua yang masih ada
+    with _lock:
+        return [item for item in _buffer if item[0] > last_id]
+
+
+def last_id():
+    with _lock:
+        return _next_id
+
+
+def format_sse(item):
+    event_id, event_type, payload = item
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n"
@@ -0,0 +1,142 @@
+import atexit
+import contextvars
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Logging tanpa blokir: thread poller hanya memasukkan record ke antrian, satu thread
+# listener yang menulis ke file. Satu record = satu baris JSON (waktu, level, pesan dan
+# field platform/member/latency jika ada). File dirotasi berdasarkan ukuran dan umur,
+# arsip lama dikompres gzip. Logging disiapkan sebelum config dimuat, jadi LOG_* harus
+# diset di environment proses, bukan di gist.
+LOG_FILE = os.getenv("LOG_FILE", "log.txt")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 5 * 1024 * 1024))
+LOG_ROTATE_INTERVAL = int(os.getenv("LOG_ROTATE_INTERVAL", 24 * 60 * 60))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
+
+FIELDS = ("platform", "member", "latency")
+
+_platform = contextvars.ContextVar("platform", default=None)
+_member = contextvars.ContextVar("member", default=None)
+_listener = None
+
+
+def bind(platform=None, member=None):
+    # Field platform/member untuk semua log di konteks ini (task asyncio/thread pool ikut mewarisi)
+    if platform is not None:
+        _platform.set(platform)
+    if member is not None:
+        _member.set(member)
+
+
+class ContextFilter(logging.Filter):
+    # Dijalankan di thread pemanggil, sebelum record masuk antrian
+    def filter(self, record):
+        if getattr(record, "platform", None) is None:
+            record.platform = _platform.get()
+        if getattr(record, "member", None) is None:
+            record.member = _member.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            "time": self.formatTime(record, "%Y-%m-%d %H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+        for field in FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = round(value, 3) if field == "latency" else value
+        # Traceback sudah digabung ke message oleh QueueHandler.prepare
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SizeTimeRotatingHandler(RotatingFileHandler):
+    # Rotasi saat file melewati LOG_MAX_BYTES atau sudah berumur LOG_ROTATE_INTERVAL detik
+    def __init__(self, filename, max_bytes, interval, backup_count):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self.interval = interval
+        self.rollover_at = time.time() + interval
+        self.namer = lambda name: name + ".gz"
+        self.rotator = _compress
+
+    def shouldRollover(self, record):
+        if self.interval and time.time() >= self.rollover_at:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = time.time() + self.interval
+
+
+def _compress(source, dest):
+    with open(source, "rb") as source_file, gzip.open(dest, "wb") as dest_file:
+        shutil.copyfileobj(source_file, dest_file)
+    os.remove(source)
+
+
+def setup(level=logging.INFO):
+    global _listener
+    if _listener is not None:
+        return
+    file_handler = SizeTimeRotatingHandler(LOG_FILE, LOG_MAX_BYTES, LOG_ROTATE_INTERVAL, LOG_BACKUP_COUNT)
+    file_handler.setFormatter(JsonFormatter())
+
+    queue_handler = QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level)
+
+    _listener = QueueListener(queue_handler.queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    # Tulis sisa antrian sebelum proses keluar
+    atexit.register(stop)
+
+
+def stop():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def tail(lines, path=None, block_size=8192):
+    # `lines` baris terakhir, dibaca mundur per blok dari akhir file
+    path = path or LOG_FILE
+    with open(path, "rb") as log_file:
+        log_file.seek(0, os.SEEK_END)
+        position = log_file.tell()
+        data = b""
+        while position > 0 and data.count(b"\n") <= lines:
+            read = min(block_size, position)
+            position -= read
+            log_file.seek(position)
+            data = log_file.read(read) + data
+    return [line.decode("utf-8", "replace") for line in data.splitlines()[-lines:]]
+
+
+def render(line):
+    # Baris JSON -> teks ringkas untuk dibaca di Telegram
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return line
+    if not isinstance(data, dict):
+        return line
+    fields = " ".join(f"{field}={data[field]}" for field in FIELDS if field in data)
+    text = f"{data.get('time')} [{str(data.get('level', '?'))[0]}] {data.get('logger')} - {data.get('message')}"
+    return f"{text} ({fields})" if fields else text
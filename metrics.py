@@ -0,0 +1,116 @@
+import threading
+from bisect import bisect_left
+
+# Metrik sederhana berformat teks Prometheus (exposition format 0.0.4) tanpa dependensi
+# tambahan. Nilai dikumpulkan di memori dan dirender saat /metrics diminta.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CYCLE_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+LAG_BUCKETS = (15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 900.0, 1800.0, 3600.0)
+
+_lock = threading.Lock()
+_meta = {}
+_counters = {}
+_histograms = {}
+_gauges = {}
+
+
+def _labels_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in (labels or {}).items()))
+
+
+def describe(name, metric_type, help_text):
+    _meta[name] = (metric_type, help_text)
+
+
+def inc(name, labels=None, value=1):
+    key = (name, _labels_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, labels=None, buckets=LATENCY_BUCKETS):
+    key = (name, _labels_key(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+            _histograms[key] = histogram
+        index = bisect_left(histogram["buckets"], value)
+        if index < len(histogram["counts"]):
+            histogram["counts"][index] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+
+def gauge(name, callback):
+    # `callback()` dipanggil saat render, mengembalikan angka atau dict
+    # {(("label", "nilai"), ...): angka} untuk gauge berlabel
+    _gauges[name] = callback
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + list(extra or [])
+    if not items:
+        return ""
+    escaped = []
+    for key, value in items:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def _header(lines, name, default_type, seen):
+    if name in seen:
+        return
+    seen.add(name)
+    metric_type, help_text = _meta.get(name, (default_type, ""))
+    if help_text:
+        lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {metric_type}")
+
+
+def render():
+    lines = []
+    seen = set()
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, dict(value, counts=list(value["counts"]))) for key, value in _histograms.items())
+
+    for (name, labels), value in counters:
+        _header(lines, name, "counter", seen)
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for (name, labels), histogram in histograms:
+        _header(lines, name, "histogram", seen)
+        cumulative = 0
+        for bound, count in zip(histogram["buckets"], histogram["counts"]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+
+    for name, callback in sorted(_gauges.items()):
+        try:
+            value = callback()
+        except Exception:
+            continue
+        _header(lines, name, "gauge", seen)
+        if isinstance(value, dict):
+            for labels, item in sorted(value.items()):
+                lines.append(f"{name}{_format_labels(labels)} {item}")
+        else:
+            lines.append(f"{name} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+describe("piobot_cycle_duration_seconds", "histogram", "Durasi satu siklus polling per platform")
+describe("piobot_upstream_requests_total", "counter", "Jumlah request upstream per host dan status")
+describe("piobot_upstream_request_duration_seconds", "histogram", "Latency request upstream per host")
+describe("piobot_upstream_errors_total", "counter", "Jumlah error request upstream per host dan jenis")
+describe("piobot_telegram_duration_seconds", "histogram", "Latency kirim/edit pesan Telegram")
+describe("piobot_telegram_errors_total", "counter", "Jumlah kirim/edit Telegram yang gagal")
+describe("piobot_queue_depth", "gauge", "Jumlah item yang menunggu di setiap antrian")
+describe("piobot_detection_lag_seconds", "histogram", "Selisih waktu deteksi dengan waktu mulai live")
+describe("piobot_event_stream_connections_total", "counter", "Jumlah koneksi ke aliran event /events")
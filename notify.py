@@ -0,0 +1,165 @@
+import threading
+import time
+from logging import getLogger
+from typing import Any, NamedTuple, Optional
+
+import sender
+import store
+
+LOGGER = getLogger(__name__)
+
+# Pipeline notifikasi: poller cukup mendeteksi transisi live (satu request per member per
+# siklus) lalu menerbitkan Event; tabel routing menyebarkannya ke semua tujuan (channel,
+# chat pribadi, grup lain). Menambah tujuan tidak menambah request ke upstream.
+# ID pesan disimpan per tujuan supaya akhir live mengedit pesan yang benar di setiap chat.
+# Selama live, caption diperbarui (mis. jumlah penonton) paling banyak sekali per
+# EDIT_WINDOW detik per pesan dan hanya jika hasil render berubah.
+EDIT_WINDOW = 120
+
+
+class Event(NamedTuple):
+    kind: str  # "start" atau "end"
+    platform: str
+    member: Any
+    name: str
+    at: int  # epoch mulai (start) / selesai (end)
+    caption: Optional[str] = None
+    photo: Optional[str] = None
+    reply_markup: Any = None
+
+
+_routes = {}
+_listeners = []
+_lock = threading.Lock()
+# "platform:member" -> {tujuan: message_id}
+_message_ids = store.PersistentDict("message_ids")
+# "platform:member" -> {"caption": caption awal, "reply_markup": json, "rendered": caption terakhir}
+_lives = store.PersistentDict("live_captions")
+# Hanya di memori: waktu edit terakhir, caption yang menunggu jendela edit, timer flush
+_last_edit = {}
+_pending = {}
+_timers = {}
+
+
+def route(platform, destination, members=None):
+    # `members` None berarti semua member platform
+    members = None if members is None else {str(member) for member in members}
+    _routes.setdefault(platform, []).append((members, destination))
+
+
+def subscribe(callback):
+    # `callback(event)` dipanggil untuk setiap Event yang diterbitkan (mis. aliran SSE lokal)
+    _listeners.append(callback)
+
+
+def destinations(platform, member):
+    found = []
+    for members, destination in _routes.get(platform, ()):
+        if (members is None or str(member) in members) and destination not in found:
+            found.append(destination)
+    return found
+
+
+def _key(platform, member):
+    return f"{platform}:{member}"
+
+
+def message_ids(platform, member):
+    with _lock:
+        return dict(_message_ids.get(_key(platform, member)) or {})
+
+
+def _remember(platform, member, destination):
+    def on_sent(message):
+        with _lock:
+            ids = dict(_message_ids.get(_key(platform, member)) or {})
+            ids[str(destination)] = message.message_id
+            _message_ids[_key(platform, member)] = ids
+    return on_sent
+
+
+def edit(ids, caption):
+    # Edit caption pesan di setiap tujuan; `ids` hasil message_ids()/publish()
+    for destination, message_id in ids.items():
+        sender.submit("edit_message_caption", destination, message_id=message_id,
+                      caption=caption, reply_markup=None, parse_mode='HTML')
+
+
+def update(platform, member, extra):
+    # Perbarui caption pesan live: caption awal + `extra`. Perubahan di dalam jendela edit
+    # digabung, hanya caption terakhir yang dikirim saat jendela berakhir
+    key = _key(platform, member)
+    with _lock:
+        if key not in _lives:
+            return
+        _pending[key] = _lives[key]["caption"] + extra
+        wait = _last_edit.get(key, 0) + EDIT_WINDOW - time.monotonic()
+        if wait > 0:
+            if key not in _timers:
+                timer = threading.Timer(wait, _flush, (key,))
+                timer.daemon = True
+                _timers[key] = timer
+                timer.start()
+            return
+    _flush(key)
+
+
+def _flush(key):
+    with _lock:
+        _timers.pop(key, None)
+        caption = _pending.pop(key, None)
+        live = _lives.get(key)
+        ids = _message_ids.get(key)
+        if caption is None or live is None or caption == live["rendered"]:
+            return
+        if not ids:
+            # Pesan awal belum terkirim, coba lagi pada update berikutnya
+            return
+        _lives[key] = dict(live, rendered=caption)
+        _last_edit[key] = time.monotonic()
+        # Masuk antrian sebelum lock dilepas supaya tidak menyusul edit akhir live
+        for destination, message_id in ids.items():
+            sender.submit("edit_message_caption", destination, message_id=message_id,
+                          caption=caption, reply_markup=live["reply_markup"], parse_mode='HTML')
+
+
+def _forget(key):
+    # Dipanggil dengan _lock dipegang
+    _lives.pop(key, None)
+    _pending.pop(key, None)
+    _last_edit.pop(key, None)
+    timer = _timers.pop(key, None)
+    if timer is not None:
+        timer.cancel()
+
+
+def publish(event):
+    # Event start: kirim foto + caption ke semua tujuan.
+    # Event end: lepas message id milik live ini dan kembalikan ({tujuan: id}); caption
+    # langsung diedit jika ada, atau diedit belakangan (mis. ringkasan crstlnz di deferred)
+    for callback in _listeners:
+        try:
+            callback(event)
+        except Exception as e:
+            LOGGER.warning(f"Error listener event {event.kind} {event.platform}: {e}")
+
+    key = _key(event.platform, event.member)
+    if event.kind == "start":
+        with _lock:
+            _lives[key] = {
+                "caption": event.caption,
+                "reply_markup": event.reply_markup.to_json() if event.reply_markup is not None else None,
+                "rendered": event.caption,
+            }
+            _last_edit[key] = time.monotonic()
+        for destination in destinations(event.platform, event.member):
+            sender.submit("send_photo", destination, on_done=_remember(event.platform, event.member, destination),
+                          photo=event.photo, caption=event.caption, reply_markup=event.reply_markup, parse_mode='HTML')
+        return {}
+
+    with _lock:
+        ids = dict(_message_ids.pop(key, None) or {})
+        _forget(key)
+    if event.caption is not None:
+        edit(ids, event.caption)
+    return ids
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+from logging import getLogger
+
+import logs
+import metrics
+
+LOGGER = getLogger(__name__)
+
+
+async def poll_members(members, fetch, handle, concurrency):
+    # Cek semua member satu platform secara bersamaan, dibatasi `concurrency` request.
+    # `fetch` adalah coroutine yang mengambil data, `handle` fungsi sinkron yang
+    # memproses transisi (kirim/edit pesan) dan dijalankan di thread pool
+    semaphore = asyncio.Semaphore(max(1, int(concurrency)))
+
+    async def poll(member):
+        # Log selama poll member ini (termasuk dari api dan handle) membawa field member
+        logs.bind(member=member)
+        try:
+            async with semaphore:
+                data = await fetch(member)
+            await asyncio.to_thread(handle, member, data)
+        except Exception as e:
+            LOGGER.warning(f"Error poll {member}: {e}")
+
+    await asyncio.gather(*(poll(member) for member in members))
+
+
+async def run_every(name, interval, cycle, after_cycle=None, first_cycle=None):
+    # Jalankan `cycle` setiap `interval` detik, dihitung dari awal siklus.
+    # `after_cycle` (sinkron) dijalankan di thread pool setelah setiap siklus, mis. flush state.
+    # `first_cycle(name)` dipanggil sekali setelah siklus pertama selesai
+    loop = asyncio.get_running_loop()
+    logs.bind(platform=name)
+    while True:
+        started = loop.time()
+        try:
+            await cycle()
+        except Exception as e:
+            LOGGER.warning(f"Error siklus {name}: {e}")
+        duration = loop.time() - started
+        metrics.observe("piobot_cycle_duration_seconds", duration, {"platform": name}, metrics.CYCLE_BUCKETS)
+        LOGGER.info(f"Siklus {name} selesai", extra={"latency": duration})
+        if after_cycle is not None:
+            try:
+                await asyncio.to_thread(after_cycle)
+            except Exception as e:
+                LOGGER.warning(f"Error setelah siklus {name}: {e}")
+        if first_cycle is not None:
+            first_cycle(name)
+            first_cycle = None
+        elapsed = loop.time() - started
+        await asyncio.sleep(max(0, interval - elapsed))
+
+
+async def run_jobs(jobs, after_cycle=None, first_cycle=None):
+    await asyncio.gather(*(run_every(name, interval, cycle, after_cycle, first_cycle) for name, interval, cycle in jobs))
+
+
+def start_engine(jobs, after_cycle=None, first_cycle=None):
+    # Event loop poller berjalan di thread sendiri, berdampingan dengan Updater webhook
+    thread = threading.Thread(target=asyncio.run, args=(run_jobs(jobs, after_cycle, first_cycle),), name="poller")
+    thread.start()
+    return thread
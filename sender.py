@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from logging import getLogger
+
+from telegram.error import BadRequest, NetworkError, RetryAfter, TimedOut
+
+import metrics
+
+LOGGER = getLogger(__name__)
+
+# Antrian kirim/edit pesan Telegram yang dipakai semua poller lewat satu Bot.
+# Batas Telegram: ~30 pesan/detik global, 1 pesan/detik per chat pribadi,
+# 20 pesan/menit per grup/channel.
+GLOBAL_INTERVAL = 1 / 30
+PRIVATE_CHAT_INTERVAL = 1.0
+GROUP_CHAT_INTERVAL = 3.0
+MAX_ATTEMPTS = 4
+
+_bot = None
+_jobs = deque()
+_lock = threading.Condition()
+_last_sent = {}
+_last_global = 0.0
+_paused_until = 0.0
+_thread = None
+
+
+def init(bot):
+    global _bot, _thread
+    _bot = bot
+    if _thread is None:
+        _thread = threading.Thread(target=_run_worker, name="sender", daemon=True)
+        _thread.start()
+
+
+def chat_interval(chat_id):
+    try:
+        private = int(chat_id) > 0
+    except (TypeError, ValueError):
+        # "@username" channel
+        private = False
+    return PRIVATE_CHAT_INTERVAL if private else GROUP_CHAT_INTERVAL
+
+
+def submit(method, chat_id, on_done=None, **kwargs):
+    # Masukkan ke antrian dan langsung kembali; hasil (Message) diserahkan lewat Future/on_done
+    future = Future()
+    if on_done is not None:
+        def callback(done):
+            if done.exception() is None:
+                try:
+                    on_done(done.result())
+                except Exception as e:
+                    LOGGER.warning(f"Error callback {method}: {e}")
+        future.add_done_callback(callback)
+
+    with _lock:
+        _jobs.append({
+            "method": method,
+            "chat_id": chat_id,
+            "kwargs": kwargs,
+            "future": future,
+            "attempt": 0,
+            "not_before": 0.0,
+        })
+        _lock.notify()
+    return future
+
+
+def depth():
+    with _lock:
+        return len(_jobs)
+
+
+def _next_job():
+    # Dipanggil dengan _lock dipegang. Ambil job pertama yang chat-nya sudah boleh dikirimi,
+    # urutan per chat tetap terjaga karena hanya job terdepan tiap chat yang dipertimbangkan
+    now = time.monotonic()
+    wait = None
+    seen = set()
+    for job in _jobs:
+        chat_id = job["chat_id"]
+        if chat_id in seen:
+            continue
+        seen.add(chat_id)
+        ready_at = max(
+            job["not_before"],
+            _last_sent.get(chat_id, 0.0) + chat_interval(chat_id),
+            _last_global + GLOBAL_INTERVAL,
+            _paused_until,
+        )
+        if ready_at <= now:
+            _jobs.remove(job)
+            return job, None
+        wait = ready_at - now if wait is None else min(wait, ready_at - now)
+    return None, wait
+
+
+def _run_worker():
+    global _last_global
+    while True:
+        with _lock:
+            job, wait = _next_job()
+            while job is None:
+                _lock.wait(wait)
+                job, wait = _next_job()
+            now = time.monotonic()
+            _last_sent[job["chat_id"]] = now
+            _last_global = now
+
+        _execute(job)
+
+
+def _requeue(job, delay):
+    with _lock:
+        job["not_before"] = time.monotonic() + delay
+        # Kembali ke depan supaya urutan pesan dalam chat yang sama tidak tertukar
+        _jobs.appendleft(job)
+        _lock.notify()
+
+
+def _call(method, chat_id, kwargs):
+    started = time.monotonic()
+    try:
+        return getattr(_bot, method)(chat_id=chat_id, **kwargs)
+    except Exception as e:
+        metrics.inc("piobot_telegram_errors_total", {"method": method, "kind": type(e).__name__})
+        raise
+    finally:
+        metrics.observe("piobot_telegram_duration_seconds", time.monotonic() - started, {"method": method})
+
+
+def _execute(job):
+    global _paused_until
+    method = job["method"]
+    try:
+        result = _call(method, job["chat_id"], job["kwargs"])
+        job["future"].set_result(result)
+    except RetryAfter as e:
+        # Flood limit: tahan semua pengiriman sampai waktu yang diminta Telegram
+        LOGGER.warning(f"Telegram RetryAfter {e.retry_after}s untuk {method}")
+        with _lock:
+            _paused_until = time.monotonic() + float(e.retry_after)
+        _requeue(job, float(e.retry_after))
+    except BadRequest as e:
+        if "not modified" in str(e).lower():
+            job["future"].set_result(None)
+        else:
+            LOGGER.warning(f"Error {method}: {e}")
+            job["future"].set_exception(e)
+    except (TimedOut, NetworkError) as e:
+        job["attempt"] += 1
+        if job["attempt"] < MAX_ATTEMPTS:
+            _requeue(job, 2 ** job["attempt"])
+        else:
+            LOGGER.warning(f"Error {method} setelah {job['attempt']} percobaan: {e}")
+            job["future"].set_exception(e)
+    except Exception as e:
+        LOGGER.warning(f"Error {method}: {e}")
+        job["future"].set_exception(e)
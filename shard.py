@@ -0,0 +1,158 @@
+import atexit
+import hashlib
+import os
+import socket
+import threading
+import time
+from bisect import bisect
+from logging import getLogger
+
+import store
+
+LOGGER = getLogger(__name__)
+
+# Mode sharding: beberapa worker berbagi satu state store (SQLite) dan membagi member
+# lewat consistent hashing. Setiap worker menulis heartbeat; worker yang berhenti
+# mengirim heartbeat dikeluarkan dari ring dan membernya pindah ke worker lain.
+# Notifikasi diklaim di store sebelum dikirim supaya hanya satu worker yang mengirim.
+SHARDING = os.getenv("SHARDING", "false").lower() in ("1", "true", "yes")
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+HEARTBEAT_INTERVAL = 10
+WORKER_TIMEOUT = 35
+VNODES = 64
+CLAIM_TTL = 3 * 24 * 60 * 60
+
+_ring = []
+_workers = ()
+_listeners = []
+_lock = threading.Lock()
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def build_ring(workers):
+    return sorted((_hash(f"{worker}#{vnode}"), worker) for worker in workers for vnode in range(VNODES))
+
+
+def owner(key, ring=None):
+    ring = _ring if ring is None else ring
+    if not ring:
+        return None
+    index = bisect(ring, (_hash(key), "")) % len(ring)
+    return ring[index][1]
+
+
+def owns_key(key):
+    if not SHARDING or key is None:
+        return True
+    # Ring belum terbentuk: anggap milik sendiri daripada tidak ada yang memolling
+    found = owner(key)
+    return found is None or found == WORKER_ID
+
+
+def owns(platform, member):
+    return owns_key(f"{platform}:{member}")
+
+
+def partition(platform, members):
+    if not SHARDING:
+        return members
+    return [member for member in members if owns(platform, member)]
+
+
+def workers():
+    return _workers
+
+
+def on_rebalance(callback):
+    _listeners.append(callback)
+
+
+def _setup():
+    store.execute(
+        "CREATE TABLE IF NOT EXISTS workers ("
+        "worker_id TEXT PRIMARY KEY, heartbeat REAL NOT NULL, started_at REAL NOT NULL)"
+    )
+    store.execute(
+        "CREATE TABLE IF NOT EXISTS claims ("
+        "event_key TEXT PRIMARY KEY, worker_id TEXT NOT NULL, claimed_at REAL NOT NULL)"
+    )
+
+
+def heartbeat():
+    global _ring, _workers
+    now = time.time()
+    store.execute(
+        "INSERT INTO workers (worker_id, heartbeat, started_at) VALUES (?, ?, ?) "
+        "ON CONFLICT(worker_id) DO UPDATE SET heartbeat = excluded.heartbeat",
+        (WORKER_ID, now, now),
+    )
+    store.execute("DELETE FROM workers WHERE heartbeat < ?", (now - WORKER_TIMEOUT,))
+    store.execute("DELETE FROM claims WHERE claimed_at < ?", (now - CLAIM_TTL,))
+    live = tuple(sorted(row[0] for row in store.query("SELECT worker_id FROM workers")))
+
+    with _lock:
+        if live == _workers:
+            return False
+        # Ambil state terbaru dari store sebelum ring berganti, supaya member yang baru
+        # dipegang melanjutkan status terakhir dari worker sebelumnya
+        store.reload_all()
+        previous = _workers
+        _workers = live
+        _ring = build_ring(live)
+    LOGGER.info(f"Rebalance shard: {len(previous)} -> {len(live)} worker ({', '.join(live)})")
+
+    for callback in _listeners:
+        try:
+            callback()
+        except Exception as e:
+            LOGGER.warning(f"Error callback rebalance: {e}")
+    return True
+
+
+def claim(event_key):
+    # True jika worker ini yang pertama mengklaim notifikasi `event_key`
+    if not SHARDING:
+        return True
+    try:
+        inserted = store.execute(
+            "INSERT OR IGNORE INTO claims (event_key, worker_id, claimed_at) VALUES (?, ?, ?)",
+            (event_key, WORKER_ID, time.time()),
+        )
+    except Exception as e:
+        # Lebih baik kemungkinan terkirim ganda daripada notifikasi hilang
+        LOGGER.warning(f"Error klaim {event_key}: {e}")
+        return True
+    return inserted == 1
+
+
+def _leave():
+    # Keluar dari ring saat berhenti normal supaya worker lain langsung mengambil alih
+    try:
+        store.flush()
+        store.execute("DELETE FROM workers WHERE worker_id = ?", (WORKER_ID,))
+    except Exception as e:
+        LOGGER.warning(f"Error keluar dari ring: {e}")
+
+
+def run_heartbeat():
+    while True:
+        time.sleep(HEARTBEAT_INTERVAL)
+        try:
+            heartbeat()
+        except Exception as e:
+            LOGGER.warning(f"Error heartbeat shard: {e}")
+
+
+def start():
+    if not SHARDING:
+        return None
+    _setup()
+    heartbeat()
+    atexit.register(_leave)
+    thread = threading.Thread(target=run_heartbeat, name="shard", daemon=True)
+    thread.start()
+    return thread
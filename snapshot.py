@@ -0,0 +1,55 @@
+import threading
+
+import shard
+import store
+
+# Snapshot member yang sedang live, diperbarui poller pada setiap transisi dan setiap
+# polling penonton. Perintah /live dijawab dari sini tanpa request ke upstream.
+# Disimpan di state store supaya tetap lengkap setelah restart (live yang sudah
+# diumumkan tidak memicu event mulai lagi).
+_lock = threading.Lock()
+_lives = store.PersistentDict("live_snapshot")
+
+
+def _key(platform, member):
+    return f"{platform}:{member}"
+
+
+def start(platform, member, name, started_at):
+    with _lock:
+        previous = _lives.get(_key(platform, member)) or {}
+        _lives[_key(platform, member)] = {
+            "platform": platform,
+            "member": member,
+            "name": name,
+            "started_at": started_at,
+            "viewers": previous.get("viewers"),
+            "peak": previous.get("peak"),
+        }
+
+
+def viewers(platform, member, count):
+    # Catat penonton saat ini, kembalikan (saat ini, puncak)
+    key = _key(platform, member)
+    with _lock:
+        live = dict(_lives.get(key) or {"platform": platform, "member": member, "name": str(member), "started_at": None})
+        live["viewers"] = count
+        live["peak"] = max(live.get("peak") or 0, count)
+        _lives[key] = live
+        return live["viewers"], live["peak"]
+
+
+def end(platform, member):
+    # Hapus dari snapshot, kembalikan data terakhir (mis. puncak penonton) atau None
+    with _lock:
+        return _lives.pop(_key(platform, member), None)
+
+
+def current():
+    # Salinan daftar live, urut dari yang paling lama berjalan
+    with _lock:
+        if shard.SHARDING:
+            # Worker lain mencatat live membernya di store yang sama
+            _lives.reload()
+        lives = [dict(live) for live in _lives.values()]
+    return sorted(lives, key=lambda live: (live.get("started_at") or 0, live["platform"]))
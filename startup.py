@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+import time
+from logging import getLogger
+
+import metrics
+
+LOGGER = getLogger(__name__)
+
+# Rincian waktu cold start per fase (config, import, bind webhook, polling pertama).
+# Diimpor paling awal di bot.py; setiap fase dihitung sejak fase sebelumnya selesai.
+_started = time.perf_counter()
+_last = _started
+_phases = []
+_waiting = set()
+_lock = threading.Lock()
+
+# Laporan update.py yang berjalan tepat sebelum bot (start.sh). Path-nya (UPDATE_REPORT)
+# dibaca saat laporan pertama kali dipakai, setelah config dimuat
+UPDATE_REPORT_MAX_AGE = 10 * 60
+_update = None
+_update_read = False
+
+
+def _read_update():
+    try:
+        with open(os.getenv("UPDATE_REPORT", ".update.json"), encoding="utf-8") as report_file:
+            update = json.load(report_file)
+    except (OSError, ValueError):
+        return None
+    # Laporan dari boot sebelumnya tidak ikut dihitung
+    if time.time() - update.get("finished_at", 0) > UPDATE_REPORT_MAX_AGE:
+        return None
+    return update
+
+
+def _get_update():
+    global _update, _update_read
+    with _lock:
+        if not _update_read:
+            _update = _read_update()
+            _update_read = True
+        return _update
+
+
+def mark(phase):
+    global _last
+    now = time.perf_counter()
+    with _lock:
+        _phases.append((phase, now - _last))
+        _last = now
+
+
+def expect(names):
+    # Nama siklus polling yang ditunggu sebelum fase "first_poll" dianggap selesai
+    with _lock:
+        _waiting.update(names)
+
+
+def cycle_done(name):
+    with _lock:
+        if name not in _waiting:
+            return
+        _waiting.discard(name)
+        done = not _waiting
+    if done:
+        mark("first_poll")
+        LOGGER.info(f"Cold start: {report()}")
+
+
+def phases():
+    with _lock:
+        return list(_phases)
+
+
+def total():
+    with _lock:
+        return _last - _started
+
+
+def report():
+    text = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in phases()) + f" (total {total():.2f}s)"
+    update = _get_update()
+    if update is not None:
+        text = f"update {update['duration']:.2f}s [{update['result']}], " + text
+    return text
+
+
+def _gauge():
+    values = {(("phase", phase),): seconds for phase, seconds in phases()}
+    update = _get_update()
+    if update is not None:
+        values[(("phase", "update"),)] = update["duration"]
+    return values
+
+
+metrics.describe("piobot_startup_phase_seconds", "gauge", "Durasi setiap fase cold start")
+metrics.gauge("piobot_startup_phase_seconds", _gauge)
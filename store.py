@@ -0,0 +1,166 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from logging import getLogger
+
+LOGGER = getLogger(__name__)
+
+# State bot disimpan di SQLite (WAL) supaya restart tidak mengumumkan ulang live yang sedang
+# berjalan dan tidak kehilangan edit akhir live. Perubahan dikumpulkan di memori lalu
+# ditulis sekaligus oleh flush() dalam satu transaksi (satu fsync per siklus polling).
+STATE_DB = os.getenv("STATE_DB", "state.db")
+
+_DELETED = object()
+
+_conn = None
+_lock = threading.RLock()
+_pending = {}
+_dicts = []
+
+
+def _connect():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(STATE_DB, check_same_thread=False, isolation_level=None)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        # Beberapa worker (mode sharding) bisa menulis ke file yang sama
+        _conn.execute("PRAGMA busy_timeout=5000")
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        atexit.register(flush)
+    return _conn
+
+
+class PersistentDict(dict):
+    # dict biasa yang mencatat setiap perubahan ke batch penulisan store.
+    # Kunci di-encode JSON supaya tipe (int/str) tetap sama setelah dimuat ulang
+    def __init__(self, namespace, defaults=None):
+        super().__init__()
+        self.namespace = namespace
+        self.defaults = dict(defaults or {})
+        super().update(self.defaults)
+        super().update(_load(namespace))
+        _dicts.append(self)
+
+    def reload(self):
+        # Muat ulang dari store (mis. setelah worker lain menulis), kecuali kunci yang
+        # perubahannya di proses ini belum di-flush
+        loaded = _load(self.namespace)
+        with _lock:
+            pending = {key for namespace, key in _pending if namespace == self.namespace}
+            for key in list(self):
+                if json.dumps(key) not in pending and key not in loaded:
+                    super().__delitem__(key)
+            for key, value in self.defaults.items():
+                if json.dumps(key) not in pending and key not in self:
+                    super().__setitem__(key, value)
+            for key, value in loaded.items():
+                if json.dumps(key) not in pending:
+                    super().__setitem__(key, value)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        _mark(self.namespace, key, value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        _mark(self.namespace, key, _DELETED)
+
+    def pop(self, key, *default):
+        if key in self:
+            _mark(self.namespace, key, _DELETED)
+        return super().pop(key, *default)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        for key in list(self):
+            del self[key]
+
+
+def _load(namespace):
+    with _lock:
+        try:
+            rows = _connect().execute("SELECT key, value FROM state WHERE namespace = ?", (namespace,)).fetchall()
+        except Exception as e:
+            LOGGER.warning(f"Error load state {namespace}: {e}")
+            return {}
+    loaded = {}
+    for key, value in rows:
+        try:
+            loaded[json.loads(key)] = json.loads(value)
+        except ValueError:
+            pass
+    return loaded
+
+
+def _mark(namespace, key, value):
+    with _lock:
+        _pending[(namespace, json.dumps(key))] = value
+
+
+def reload_all():
+    flush()
+    for persistent in _dicts:
+        persistent.reload()
+
+
+def query(sql, params=()):
+    # Query langsung di luar batch flush, mis. untuk koordinasi antar worker
+    with _lock:
+        return _connect().execute(sql, params).fetchall()
+
+
+def execute(sql, params=()):
+    with _lock:
+        return _connect().execute(sql, params).rowcount
+
+
+def pending_writes():
+    with _lock:
+        return len(_pending)
+
+
+def flush():
+    # Tulis semua perubahan yang tertunda dalam satu transaksi
+    with _lock:
+        if not _pending:
+            return 0
+        batch = dict(_pending)
+        _pending.clear()
+        try:
+            conn = _connect()
+            conn.execute("BEGIN")
+            for (namespace, key), value in batch.items():
+                if value is _DELETED:
+                    conn.execute("DELETE FROM state WHERE namespace = ? AND key = ?", (namespace, key))
+                else:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO state (namespace, key, value) VALUES (?, ?, ?)",
+                        (namespace, key, json.dumps(value)),
+                    )
+            conn.execute("COMMIT")
+            return len(batch)
+        except Exception as e:
+            LOGGER.warning(f"Error flush state: {e}")
+            try:
+                conn.execute("ROLLBACK")
+            except Exception:
+                pass
+            # Kembalikan ke batch supaya dicoba lagi pada flush berikutnya
+            for item, value in batch.items():
+                _pending.setdefault(item, value)
+            return 0
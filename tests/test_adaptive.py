@@ -0,0 +1,53 @@
+import os
+import tempfile
+
+# State store sementara, harus diset sebelum store diimpor
+os.environ["STATE_DB"] = os.path.join(tempfile.mkdtemp(), "state.db")
+
+import adaptive  # noqa: E402
+
+BASE = 60
+CAP = 900
+
+
+def simulate(platform, members, status, cycles, interval=BASE, duration=0.5, schedule_at_end=False):
+    # Jalankan siklus seperti scheduler.run_every (setiap `interval` detik dari awal siklus),
+    # kembalikan {member: [waktu mulai siklus saat member dipolling]}
+    t0 = 1_700_000_000
+    polled_at = {member: [] for member in members}
+    for cycle in range(cycles):
+        started = t0 + cycle * interval
+        polled = adaptive.due(platform, members, started)
+        for member in polled:
+            polled_at[member].append(started - t0)
+        now = started + duration if schedule_at_end else started
+        adaptive.observe(platform, members, status, polled, BASE, CAP, now)
+    return polled_at
+
+
+def test_base_member_polled_every_cycle():
+    polled_at = simulate("test_base", ["a"], {"a": False}, 6)
+    assert polled_at["a"] == [0, 60, 120, 180, 240, 300]
+
+
+def test_cycle_duration_does_not_add_a_cycle():
+    polled_at = simulate("test_duration", ["a"], {"a": False}, 6, schedule_at_end=True)
+    assert polled_at["a"] == [0, 60, 120, 180, 240, 300]
+
+
+def test_live_member_polled_every_cycle():
+    polled_at = simulate("test_live", ["a"], {"a": True}, 5, duration=5, schedule_at_end=True)
+    assert polled_at["a"] == [0, 60, 120, 180, 240]
+
+
+def test_dormant_member_backs_off():
+    platform = "test_dormant"
+    now = 1_700_000_000
+    # Profil lama tanpa live dan tanpa jam live biasa: interval sudah mencapai batas
+    adaptive.profiles[adaptive._key(platform, "a")] = {
+        "hours": [0] * 24, "last_live": None, "first_seen": now - 30 * 86400, "online": False,
+    }
+    adaptive.observe(platform, ["a"], {"a": False}, ["a"], BASE, CAP, now)
+    due_times = [offset for offset in range(0, 2 * CAP, BASE) if adaptive.due(platform, ["a"], now + offset)]
+    # Polling berikutnya tidak lebih awal dari setengah interval dan tidak melewati batas
+    assert CAP * (1 - adaptive.DUE_TOLERANCE) <= due_times[0] <= CAP
@@ -1,44 +1,71 @@
+import json
 import os
 import subprocess
-import httpx
-from io import StringIO
-from logging import basicConfig, getLogger, INFO
-from dotenv import load_dotenv
-
-# Konfigurasi logger
-basicConfig(
-    filename="log.txt",
-    format="{asctime} - [{levelname[0]}] {name} [{module}:{lineno}] - {message}",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    style="{",
-    level=INFO,
-)
+import time
+from logging import getLogger
 
-LOGGER = getLogger(__name__)
+import config
+import logs
 
-# Mendapatkan isi dari file .env di GitHub Gist
-CONFIG_FILE_URL = os.getenv("CONFIG_FILE_URL", "")
-response = httpx.get(CONFIG_FILE_URL)
-env_content = response.text
+# Log JSON lewat antrian, dirotasi dan dikompres (lihat logs.py)
+logs.setup()
 
-# Membuat buffer string dan menulis isi .env ke dalamnya
-env_buffer = StringIO(env_content)
+LOGGER = getLogger(__name__)
 
-# Memuat variabel dari buffer menggunakan load_dotenv
-load_dotenv(stream=env_buffer)
+# Memuat .env dari cache lokal (atau GitHub Gist saat boot pertama); bot.py yang
+# memvalidasi ulang cache di background
+config.load(background=False)
 
 UPSTREAM_REPO = os.getenv("UPSTREAM_REPO")
-UPSTREAM_BRANCH = os.getenv("UPSTREAM_BRANCH")
+UPSTREAM_BRANCH = os.getenv("UPSTREAM_BRANCH") or "main"
 
-# Perbarui repositori GitHub
-if UPSTREAM_REPO is not None:
-    if os.path.exists(".git"):
-        subprocess.run([
-            "rm -rf .git"
-        ], shell=True)
+# "shallow": pakai checkout yang ada, fetch depth 1 dan reset hanya jika commit remote berubah.
+# "reinit": cara lama, hapus .git lalu fetch penuh
+UPDATE_MODE = os.getenv("UPDATE_MODE", "shallow")
+# Batas waktu setiap perintah git, supaya upstream yang lambat tidak menahan start bot
+UPDATE_TIMEOUT = int(os.getenv("UPDATE_TIMEOUT", 60))
+# Hasil update dibaca bot.py untuk rincian cold start
+UPDATE_REPORT = os.getenv("UPDATE_REPORT", ".update.json")
+
+
+def git(*args):
+    process = subprocess.run(["git", *args], capture_output=True, text=True, timeout=UPDATE_TIMEOUT)
+    if process.returncode != 0:
+        raise RuntimeError(f"git {args[0]}: {process.stderr.strip()}")
+    return process.stdout.strip()
+
+
+def head():
+    try:
+        return git("rev-parse", "HEAD")
+    except RuntimeError:
+        return None
+
+
+def update_shallow():
+    if not os.path.isdir(".git"):
+        git("init", "-q")
+    try:
+        git("remote", "set-url", "origin", UPSTREAM_REPO)
+    except RuntimeError:
+        git("remote", "add", "origin", UPSTREAM_REPO)
 
+    # Satu round-trip ringan untuk tahu commit terbaru di remote
+    remote = git("ls-remote", "origin", f"refs/heads/{UPSTREAM_BRANCH}").split()
+    if not remote:
+        raise RuntimeError(f"branch {UPSTREAM_BRANCH} tidak ditemukan di UPSTREAM_REPO")
+    if remote[0] == head():
+        return "unchanged"
+
+    git("fetch", "-q", "--depth", "1", "origin", UPSTREAM_BRANCH)
+    git("reset", "-q", "--hard", "FETCH_HEAD")
+    return "updated"
+
+
+def update_reinit():
     process = subprocess.run([
-            f"git init -q \
+            f"rm -rf .git \
+            && git init -q \
             && git config --global user.email evanfauzi0@gmail.com \
             && git config --global user.name pranendraa \
             && git add . \
@@ -46,13 +73,36 @@ if UPSTREAM_REPO is not None:
             && git remote add origin {UPSTREAM_REPO} \
             && git fetch origin -q \
             && git reset --hard origin/{UPSTREAM_BRANCH} -q"
-        ], shell=True)
+        ], shell=True, timeout=UPDATE_TIMEOUT)
+    if process.returncode != 0:
+        raise RuntimeError(f"exit code {process.returncode}")
+    return "updated"
+
+
+def write_report(result, duration):
+    try:
+        with open(UPDATE_REPORT, "w", encoding="utf-8") as report_file:
+            json.dump({"result": result, "duration": duration, "head": head(), "finished_at": time.time()}, report_file)
+    except OSError as e:
+        LOGGER.warning(f"Error tulis laporan update: {e}")
+
+
+# Perbarui repositori GitHub. Kegagalan tidak menghentikan start, bot berjalan dengan
+# kode yang sudah ada
+if UPSTREAM_REPO is not None:
+    started = time.perf_counter()
+    try:
+        result = update_reinit() if UPDATE_MODE == "reinit" else update_shallow()
+    except (RuntimeError, OSError, subprocess.SubprocessError) as e:
+        result = "failed"
+        LOGGER.error(f"Something wrong while updating, keeping current code: {e}")
+    duration = time.perf_counter() - started
+    write_report(result, duration)
 
-    if process.returncode == 0:
-        LOGGER.info("Successfully updated with latest commit from UPSTREAM_REPO!")
-    else:
-        LOGGER.error(
-            "Something wrong while updating! Check UPSTREAM_REPO if valid or not!")
+    if result == "updated":
+        LOGGER.info(f"Successfully updated with latest commit from UPSTREAM_REPO in {duration:.2f}s!")
+    elif result == "unchanged":
+        LOGGER.info(f"Already at latest commit of {UPSTREAM_BRANCH}, checked in {duration:.2f}s")
 
 else:
     LOGGER.warning("UPSTREAM_REPO is not found!")
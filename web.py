@@ -0,0 +1,82 @@
+from datetime import timedelta
+from logging import getLogger
+
+from tornado.iostream import StreamClosedError
+from tornado.locks import Condition
+from tornado.web import RequestHandler
+
+import events
+import metrics
+
+LOGGER = getLogger(__name__)
+
+# Komentar SSE berkala supaya proxy/klien tidak memutus koneksi yang sedang sepi
+PING_INTERVAL = 15
+
+_loop = None
+_new_event = Condition()
+
+
+def _wake():
+    # Dipanggil dari thread penerbit event; Condition tornado hanya boleh disentuh dari IOLoop-nya
+    if _loop is not None:
+        _loop.add_callback(_new_event.notify_all)
+
+
+events.subscribe(_wake)
+
+
+class MetricsHandler(RequestHandler):
+    def get(self):
+        self.set_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.write(metrics.render())
+
+
+class EventStreamHandler(RequestHandler):
+    # Server-Sent Events transisi live. Klien yang tersambung ulang mengirim header
+    # Last-Event-ID (atau ?last_event_id=) dan menerima event yang terlewat dari ring buffer
+    async def get(self):
+        self.set_header("Content-Type", "text/event-stream")
+        self.set_header("Cache-Control", "no-cache")
+        self.set_header("X-Accel-Buffering", "no")
+
+        cursor = self.request.headers.get("Last-Event-ID") or self.get_argument("last_event_id", None)
+        try:
+            cursor = int(cursor)
+        except (TypeError, ValueError):
+            # Klien baru mulai dari event berikutnya
+            cursor = events.last_id()
+
+        metrics.inc("piobot_event_stream_connections_total")
+        try:
+            self.write("retry: 3000\n\n")
+            await self.flush()
+            while True:
+                items = events.since(cursor)
+                if items:
+                    for item in items:
+                        self.write(events.format_sse(item))
+                    cursor = items[-1][0]
+                    await self.flush()
+                    continue
+                # Tidak ada yield antara since() dan wait(), jadi event baru tidak terlewat
+                if not await _new_event.wait(timeout=timedelta(seconds=PING_INTERVAL)):
+                    self.write(": ping\n\n")
+                    await self.flush()
+        except StreamClosedError:
+            pass
+
+
+def add_routes(updater, routes):
+    # Tambahkan route ke aplikasi tornado milik webhook Updater (port yang sama dengan
+    # webhook Telegram). Harus dipanggil setelah start_webhook; route didaftarkan
+    # lewat IOLoop webhook supaya tidak bersaing dengan request yang sedang dilayani
+    global _loop
+    httpd = getattr(updater, "httpd", None)
+    if httpd is None or httpd.loop is None:
+        LOGGER.warning("Webhook belum berjalan, route tambahan tidak dipasang")
+        return False
+    _loop = httpd.loop
+    app = httpd.http_server.request_callback
+    httpd.loop.add_callback(app.add_handlers, r".*", routes)
+    return True
@@ -0,0 +1,57 @@
+import time
+from datetime import datetime
+from functools import lru_cache
+
+# Waktu di seluruh bot disimpan sebagai epoch detik (int). Konversi ke teks WIB hanya
+# dilakukan saat pesan dirender. Asia/Jakarta tidak memakai DST, jadi cukup offset tetap.
+# Nama hari/bulan mengikuti locale proses (id_ID di bot).
+WIB_OFFSET = 7 * 60 * 60
+
+
+def now():
+    return int(time.time())
+
+
+def parse_iso(value):
+    # "2024-05-01T12:34:56.789Z" -> epoch detik (UTC)
+    return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
+
+
+def hour(timestamp):
+    return time.gmtime(timestamp + WIB_OFFSET).tm_hour
+
+
+@lru_cache(maxsize=64)
+def _day(day, pattern):
+    # Bagian tanggal hanya diformat sekali per hari (strftime + locale relatif mahal)
+    return time.strftime(pattern, time.gmtime(day * 86400))
+
+
+def _split(timestamp):
+    local = int(timestamp) + WIB_OFFSET
+    day, seconds = divmod(local, 86400)
+    return day, seconds
+
+
+def format_clock(timestamp):
+    _, seconds = _split(timestamp)
+    return "{:02d}:{:02d}:{:02d}".format(seconds // 3600, seconds % 3600 // 60, seconds % 60)
+
+
+def format_wib(timestamp):
+    # "Senin, 01 Mei 2024 | 19:34:56 WIB"
+    day, _ = _split(timestamp)
+    return f"{_day(day, '%A, %d %b %Y')} | {format_clock(timestamp)} WIB"
+
+
+def format_day(timestamp):
+    return _day(_split(timestamp)[0], "%A")
+
+
+def format_date(timestamp):
+    return _day(_split(timestamp)[0], "%d %B %Y")
+
+
+def format_duration(seconds):
+    seconds = max(0, int(seconds))
+    return "{:02d}:{:02d}:{:02d}".format(seconds // 3600, seconds % 3600 // 60, seconds % 60)